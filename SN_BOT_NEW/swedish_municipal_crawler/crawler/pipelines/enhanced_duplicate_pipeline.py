@@ -1,29 +1,243 @@
 import hashlib
+import mmap
+import os
 import re
+import shelve
+import struct
 import logging
-from datetime import datetime
+from functools import lru_cache
+from operator import truth
+from pathlib import Path
 try:  # Scrapy might not be installed in minimal test environments
     from scrapy.exceptions import DropItem
 except Exception:  # pragma: no cover - fallback definition
     class DropItem(Exception):
         pass
+from ..utils.timestamps import CoarseTimestamp
+
+# Core fee concepts used by _semantic_normalize
+SEMANTIC_KEYWORDS = (
+    'bygglov', 'miljötillstånd', 'serveringstillstånd', 'näringstillstånd',
+    'hemtjänst', 'äldreomsorg', 'barnomsorg', 'förskola',
+    'vatten', 'avlopp', 'renhållning', 'parkering',
+    'nybyggnad', 'tillbyggnad', 'ändring', 'rivning'
+)
+
+# One pass finds every keyword occurrence: the lookahead reports a match at
+# each position without consuming text, so overlapping keywords are kept
+SEMANTIC_KEYWORD_PATTERN = re.compile(
+    '(?=(' + '|'.join(map(re.escape, SEMANTIC_KEYWORDS)) + '))'
+)
+
+# Normalization patterns, compiled once. Stop words, currency words and
+# punctuation are all deleted, so they share one pass
+WHITESPACE_PATTERN = re.compile(r'\s+')
+FILLER_PATTERN = re.compile(r'\b(?:för|av|till|från|med|utan|per|kr|kronor|sek)\b|[^\w\s]')
+FEE_WORD_PATTERN = re.compile(r'\b(avgift|taxa|kostnad|pris|belopp)\b')
+SIGNIFICANT_WORD_PATTERN = re.compile(r'\b\w{3,}\b')
+
+# The normalizers are pure string functions and municipality names and fee
+# names repeat heavily during a crawl, so each distinct input is processed once
+NORMALIZE_CACHE_SIZE = 131072
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_text(text):
+    """Basic text normalization"""
+    if not text:
+        return ""
+    return WHITESPACE_PATTERN.sub(' ', str(text).lower().strip())
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _fuzzy_normalize(text):
+    """Fuzzy normalization for minor variations"""
+    if not text:
+        return ""
+    
+    # Unify fee words first: deleting punctuation can join word fragments
+    # into a fee word, which must not be rewritten
+    text = FEE_WORD_PATTERN.sub('avgift', text)
+    
+    # Remove stop words, currency words and punctuation
+    text = FILLER_PATTERN.sub('', text)
+    text = WHITESPACE_PATTERN.sub(' ', text).strip()
+    
+    return text
+
+@lru_cache(maxsize=4096)
+def _join_keywords(keywords):
+    """Sorted, space-joined semantic key for a set of keywords"""
+    # Many fee names reduce to the same few keyword sets; sorting and joining
+    # once per set also lets them share a single key string
+    return ' '.join(sorted(keywords))
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _semantic_normalize(text):
+    """Semantic normalization for core meaning"""
+    if not text:
+        return ""
+    
+    # Extract key semantic components
+    text_lower = text.lower()
+    found_keywords = frozenset(
+        match.group(1) for match in SEMANTIC_KEYWORD_PATTERN.finditer(text_lower)
+    )
+    
+    if found_keywords:
+        return _join_keywords(found_keywords)
+    else:
+        # Fallback to first few significant words
+        words = SIGNIFICANT_WORD_PATTERN.findall(text_lower)
+        return ' '.join(words[:3])
+
+def _within_edit_distance(a, b, limit):
+    """Check whether two strings are at most `limit` Levenshtein edits apart"""
+    len_b = len(b)
+    if abs(len(a) - len_b) > limit:
+        return False
+    if a == b:
+        return True
+    
+    # Only cells within `limit` of the diagonal can stay under the limit, so
+    # each row computes that band and the scan stops once a row exceeds it
+    too_far = limit + 1
+    previous = [j if j <= limit else too_far for j in range(len_b + 1)]
+    for i, char_a in enumerate(a, 1):
+        current = [too_far] * (len_b + 1)
+        current[0] = row_min = min(i, too_far)
+        for j in range(max(1, i - limit), min(len_b, i + limit) + 1):
+            distance = min(
+                previous[j - 1] + (char_a != b[j - 1]),
+                previous[j] + 1,
+                current[j - 1] + 1,
+                too_far
+            )
+            current[j] = distance
+            if distance < row_min:
+                row_min = distance
+        if row_min > limit:
+            return False
+        previous = current
+    return previous[len_b] <= limit
+
+class FingerprintBloomFilter:
+    """Counting Bloom filter over 16-byte fingerprint digests"""
+    
+    def __init__(self, size=1 << 22, counters=None):
+        self.size = size
+        # One saturating 8-bit counter per slot so fingerprints can be removed again
+        self.counters = bytearray(size) if counters is None else counters
+    
+    @classmethod
+    def open(cls, path, size=1 << 22):
+        """Open a filter whose counters live in a memory-mapped file"""
+        fd = os.open(path, os.O_RDWR | os.O_CREAT)
+        try:
+            if os.fstat(fd).st_size != size:
+                # Counters from a filter of another size map to other slots
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            counters = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        return cls(size, counters)
+    
+    def close(self):
+        """Flush file-backed counters to disk"""
+        if isinstance(self.counters, mmap.mmap):
+            self.counters.flush()
+            self.counters.close()
+    
+    def _positions(self, fingerprint):
+        """Derive 4 slot positions from the digest itself"""
+        # Fingerprints are already uniform hashes, so split them into four
+        # 32-bit indexes instead of hashing again
+        size = self.size
+        return [value % size for value in struct.unpack('<4I', fingerprint)]
+    
+    def add(self, fingerprint):
+        counters = self.counters
+        for position in self._positions(fingerprint):
+            if counters[position] < 255:
+                counters[position] += 1
+    
+    def remove(self, fingerprint):
+        counters = self.counters
+        for position in self._positions(fingerprint):
+            # Saturated counters have lost their exact count and must stay set
+            if 0 < counters[position] < 255:
+                counters[position] -= 1
+    
+    def __contains__(self, fingerprint):
+        counters = self.counters
+        return all(counters[position] for position in self._positions(fingerprint))
+
+class _SeenFee:
+    """Stored item with its fingerprints and its quality score, computed on first comparison"""
+    __slots__ = ('item', 'fingerprints', 'quality')
+    
+    def __init__(self, item, fingerprints, quality=None):
+        self.item = item
+        self.fingerprints = fingerprints
+        self.quality = quality
 
 class EnhancedDuplicatesPipeline:
     """Enhanced duplicate detection with intelligent merging and quality scoring"""
     
-    def __init__(self):
+    # How _merge_items combines a field present in both items. Free-text
+    # fields take the text of the higher-quality item unless the two texts are
+    # near-identical; every other field only takes the new value when the
+    # existing one is empty ('validation' is then merged field by field)
+    MERGE_POLICY = {
+        'fee_name': 'text',
+        'description': 'text',
+        'context': 'text',
+        'legal_reference': 'text',
+        'contact_info': 'text'
+    }
+    
+    # Texts this many edits apart or fewer count as the same value
+    TEXT_MERGE_DISTANCE = 2
+    
+    # Fields counted by _score_data_completeness
+    IMPORTANT_FIELDS = (
+        'fee_name', 'amount', 'currency', 'category', 'description',
+        'source_url', 'extraction_method', 'municipality'
+    )
+    
+    def __init__(self, state_dir=None):
         self.logger = logging.getLogger(__name__)
-        self.seen_fees = {}
+        # Each unique fee is stored once under its canonical (exact) fingerprint;
+        # the other strategy fingerprints only map to that 16-byte key
+        self.items_by_fingerprint = {}
+        self.fingerprint_aliases = {}
+        
+        # With a state directory stored fees are kept in a shelve, so later
+        # crawls dedup against this one; the dicts above then act as an
+        # in-memory front cache. A memory-mapped Bloom filter answers misses
+        # in front of the shelve. In memory alone the dicts are the index, as
+        # a dict lookup is much cheaper than probing the filter
+        self.fingerprint_store = None
+        self.fingerprint_filter = None
+        if state_dir:
+            state_dir = Path(state_dir)
+            state_dir.mkdir(parents=True, exist_ok=True)
+            self.fingerprint_filter = FingerprintBloomFilter.open(str(state_dir / 'fingerprints.bloom'))
+            self.fingerprint_store = shelve.open(str(state_dir / 'fingerprints'))
         self.duplicates_removed = 0
         self.duplicates_merged = 0
         self.quality_upgrades = 0
         
-        # Duplicate detection strategies
+        # Duplicate detection strategies, probed in order (cheapest first)
         self.detection_strategies = [
             'exact_match',
             'fuzzy_match',
             'semantic_match'
         ]
+        self.fingerprint_builders = {
+            'exact_match': self._exact_fingerprint,
+            'fuzzy_match': self._fuzzy_fingerprint,
+            'semantic_match': self._semantic_fingerprint
+        }
         
         # Quality indicators for comparison
         self.quality_weights = {
@@ -33,41 +247,87 @@ class EnhancedDuplicatesPipeline:
             'data_completeness': 0.15,
             'source_reliability': 0.1
         }
+        
+        # Extraction method reliability, matched by substring of the method name
+        self.method_scores = {
+            'pdf': 0.9,
+            'bygglov': 0.95,
+            'table': 0.8,
+            'playwright': 0.7,
+            'ajax': 0.6,
+            'enhanced': 0.75,
+            'generic': 0.5
+        }
+        self._method_score_cache = {}
+        
+        # Weights never change after start-up, so bake them into the scorer
+        self._calculate_quality_score = self._build_quality_scorer(self.quality_weights)
+        
+        # Merges can be frequent; the merge timestamp only needs second resolution
+        self.timestamp = CoarseTimestamp()
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings.getdict('ENHANCED_DUPLICATE_SETTINGS')
+        return cls(state_dir=settings.get('state_dir'))
     
     def process_item(self, item, spider):
         """Enhanced duplicate detection with intelligent merging"""
         try:
-            # Create multiple fingerprints for different detection strategies
-            fingerprints = self._create_fingerprints(item)
-            
-            # Check for duplicates using different strategies
+            # Check for duplicates using different strategies. Fingerprints are
+            # built one strategy at a time, so an exact hit skips the fuzzy and
+            # semantic normalization entirely
+            parts = self._fingerprint_parts(item)
+            fingerprints = {}
             duplicate_found = False
             best_match = None
             best_strategy = None
+            best_canonical = None
             
-            for strategy, fingerprint in fingerprints.items():
-                if fingerprint in self.seen_fees:
-                    existing_item = self.seen_fees[fingerprint]
+            for strategy in self.detection_strategies:
+                fingerprint = self.fingerprint_builders[strategy](parts)
+                fingerprints[strategy] = fingerprint
+                
+                canonical, existing_entry = self._find_entry(fingerprint)
+                if existing_entry is not None:
                     duplicate_found = True
-                    best_match = existing_item
+                    best_match = existing_entry
                     best_strategy = strategy
+                    best_canonical = canonical
                     break
             
             if duplicate_found:
+                # The stored item's score only changes when it is replaced or
+                # merged, so compute it once and reuse it for later duplicates
+                if best_match.quality is None:
+                    best_match.quality = self._calculate_quality_score(best_match.item)
+                new_quality = self._calculate_quality_score(item)
+                
                 # Decide whether to merge, replace, or drop
-                action = self._determine_action(best_match, item, best_strategy)
+                action = self._determine_action(best_match.quality, new_quality, best_strategy)
+                
+                # The new item needs all of its fingerprints to be stored. Sharing
+                # the stored item's exact fingerprint means sharing its normalized
+                # fields, and so the rest of its fingerprints as well
+                if action != 'drop':
+                    if best_strategy == 'exact_match' and best_canonical == fingerprints['exact_match']:
+                        fingerprints = best_match.fingerprints
+                    else:
+                        for strategy in self.detection_strategies:
+                            if strategy not in fingerprints:
+                                fingerprints[strategy] = self.fingerprint_builders[strategy](parts)
                 
                 if action == 'replace':
                     # Replace with higher quality item
-                    self._replace_item(best_match, item, fingerprints)
+                    self._replace_item(best_canonical, _SeenFee(item, fingerprints, new_quality))
                     self.quality_upgrades += 1
                     self.logger.debug(f"Replaced duplicate with higher quality version: {item.get('fee_name', 'Unknown')}")
                     return item
                 
                 elif action == 'merge':
                     # Merge items to create enhanced version
-                    merged_item = self._merge_items(best_match, item)
-                    self._replace_item(best_match, merged_item, fingerprints)
+                    merged_item = self._merge_items(best_match.item, item, best_match.quality, new_quality)
+                    self._replace_item(best_canonical, _SeenFee(merged_item, fingerprints))
                     self.duplicates_merged += 1
                     self.logger.debug(f"Merged duplicate items: {item.get('fee_name', 'Unknown')}")
                     return merged_item
@@ -77,9 +337,8 @@ class EnhancedDuplicatesPipeline:
                     raise DropItem(f"Duplicate fee (lower quality): {item.get('fee_name', 'Unknown')}")
             
             else:
-                # No duplicate found, store all fingerprints
-                for strategy, fingerprint in fingerprints.items():
-                    self.seen_fees[fingerprint] = item
+                # No duplicate found, store the item under its canonical fingerprint
+                self._store_entry(_SeenFee(item, fingerprints))
                 
                 return item
         
@@ -87,37 +346,46 @@ class EnhancedDuplicatesPipeline:
             self.logger.error(f"Error in duplicate detection: {e}")
             return item
     
-    def _create_fingerprints(self, item):
-        """Create multiple fingerprints for different detection strategies"""
-        fingerprints = {}
-        
+    def _fingerprint_parts(self, item):
+        """Normalize and encode the fields shared by all fingerprint strategies"""
         # Extract key fields
-        municipality = self._normalize_text(item.get('municipality', ''))
-        fee_name = self._normalize_text(item.get('fee_name', ''))
+        # The cached normalizers need hashable arguments, so values are passed
+        # as strings; empty values still normalize to ""
+        municipality = _normalize_text(str(item.get('municipality', '') or ''))
+        fee_name = _normalize_text(str(item.get('fee_name', '') or ''))
         amount = self._normalize_amount(item.get('amount', 0))
-        unit = self._normalize_text(item.get('unit', 'kr'))
-        
-        # Strategy 1: Exact match
-        exact_str = f"{municipality}|{fee_name}|{amount}|{unit}"
-        fingerprints['exact_match'] = hashlib.md5(exact_str.encode()).hexdigest()
-        
-        # Strategy 2: Fuzzy match (ignore minor variations)
-        fuzzy_fee_name = self._fuzzy_normalize(fee_name)
-        fuzzy_str = f"{municipality}|{fuzzy_fee_name}|{amount}|{unit}"
-        fingerprints['fuzzy_match'] = hashlib.md5(fuzzy_str.encode()).hexdigest()
-        
-        # Strategy 3: Semantic match (focus on core meaning)
-        semantic_fee_name = self._semantic_normalize(fee_name)
-        semantic_str = f"{municipality}|{semantic_fee_name}|{amount}"
-        fingerprints['semantic_match'] = hashlib.md5(semantic_str.encode()).hexdigest()
-        
-        return fingerprints
+        unit = _normalize_text(str(item.get('unit', 'kr') or ''))
+        
+        # Fingerprints hash "municipality|fee_name|amount[|unit]"; the fixed
+        # head and tails are fed to the hasher instead of formatting each string
+        head = municipality.encode() + b'|'
+        amount_tail = b'|' + amount.encode()
+        unit_tail = amount_tail + b'|' + unit.encode()
+        return head, fee_name, amount_tail, unit_tail
+    
+    def _exact_fingerprint(self, parts):
+        """Strategy 1: Exact match"""
+        head, fee_name, amount_tail, unit_tail = parts
+        return self._digest(head, fee_name, unit_tail)
     
-    def _normalize_text(self, text):
-        """Basic text normalization"""
-        if not text:
-            return ""
-        return re.sub(r'\s+', ' ', str(text).lower().strip())
+    def _fuzzy_fingerprint(self, parts):
+        """Strategy 2: Fuzzy match (ignore minor variations)"""
+        head, fee_name, amount_tail, unit_tail = parts
+        return self._digest(head, _fuzzy_normalize(fee_name), unit_tail)
+    
+    def _semantic_fingerprint(self, parts):
+        """Strategy 3: Semantic match (focus on core meaning)"""
+        head, fee_name, amount_tail, unit_tail = parts
+        return self._digest(head, _semantic_normalize(fee_name), amount_tail)
+    
+    def _digest(self, head, fee_name, tail):
+        """Hash fingerprint parts to a compact 16-byte dedup key"""
+        # Keys are only compared for equality, so a raw BLAKE2b digest is enough;
+        # it hashes faster than MD5 and skips the hex encoding
+        hasher = hashlib.blake2b(head, digest_size=16)
+        hasher.update(fee_name.encode())
+        hasher.update(tail)
+        return hasher.digest()
     
     def _normalize_amount(self, amount):
         """Normalize amount for comparison"""
@@ -127,48 +395,8 @@ class EnhancedDuplicatesPipeline:
         except (ValueError, TypeError):
             return "0"
     
-    def _fuzzy_normalize(self, text):
-        """Fuzzy normalization for minor variations"""
-        if not text:
-            return ""
-        
-        # Remove common variations
-        text = re.sub(r'\b(för|av|till|från|med|utan|per)\b', '', text)
-        text = re.sub(r'\b(avgift|taxa|kostnad|pris|belopp)\b', 'avgift', text)
-        text = re.sub(r'\b(kr|kronor|sek)\b', '', text)
-        text = re.sub(r'[^\w\s]', '', text)  # Remove punctuation
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
-    
-    def _semantic_normalize(self, text):
-        """Semantic normalization for core meaning"""
-        if not text:
-            return ""
-        
-        # Extract key semantic components
-        semantic_keywords = [
-            'bygglov', 'miljötillstånd', 'serveringstillstånd', 'näringstillstånd',
-            'hemtjänst', 'äldreomsorg', 'barnomsorg', 'förskola',
-            'vatten', 'avlopp', 'renhållning', 'parkering',
-            'nybyggnad', 'tillbyggnad', 'ändring', 'rivning'
-        ]
-        
-        text_lower = text.lower()
-        found_keywords = [kw for kw in semantic_keywords if kw in text_lower]
-        
-        if found_keywords:
-            return ' '.join(sorted(found_keywords))
-        else:
-            # Fallback to first few significant words
-            words = re.findall(r'\b\w{3,}\b', text_lower)
-            return ' '.join(words[:3])
-    
-    def _determine_action(self, existing_item, new_item, strategy):
+    def _determine_action(self, existing_quality, new_quality, strategy):
         """Determine what action to take with duplicate"""
-        existing_quality = self._calculate_quality_score(existing_item)
-        new_quality = self._calculate_quality_score(new_item)
-        
         quality_diff = new_quality - existing_quality
         
         # If new item is significantly better, replace
@@ -183,60 +411,71 @@ class EnhancedDuplicatesPipeline:
         else:
             return 'drop'
     
-    def _calculate_quality_score(self, item):
-        """Calculate overall quality score for an item"""
-        score = 0.0
-        
-        # Confidence score
-        confidence = item.get('validation', {}).get('confidence_score', item.get('confidence', 0.5))
-        score += confidence * self.quality_weights['confidence']
-        
-        # Validation score
-        validation_score = item.get('quality', {}).get('overall_score', 0.5)
-        score += validation_score * self.quality_weights['validation_score']
-        
-        # Extraction method quality
-        method_score = self._score_extraction_method(item.get('extraction_method', ''))
-        score += method_score * self.quality_weights['extraction_method']
-        
-        # Data completeness
-        completeness_score = self._score_data_completeness(item)
-        score += completeness_score * self.quality_weights['data_completeness']
-        
-        # Source reliability
-        reliability_score = self._score_source_reliability(item)
-        score += reliability_score * self.quality_weights['source_reliability']
+    def _build_quality_scorer(self, quality_weights):
+        """Build the overall quality scorer with weights and sub-scorers bound as locals"""
+        confidence_weight = quality_weights['confidence']
+        validation_weight = quality_weights['validation_score']
+        method_weight = quality_weights['extraction_method']
+        completeness_weight = quality_weights['data_completeness']
+        reliability_weight = quality_weights['source_reliability']
+        score_extraction_method = self._score_extraction_method
+        score_data_completeness = self._score_data_completeness
+        score_source_reliability = self._score_source_reliability
+        
+        def calculate_quality_score(item):
+            """Calculate overall quality score for an item"""
+            score = 0.0
+            
+            # Confidence score
+            confidence = item.get('validation', {}).get('confidence_score', item.get('confidence', 0.5))
+            score += confidence * confidence_weight
+            
+            # Validation score
+            validation_score = item.get('quality', {}).get('overall_score', 0.5)
+            score += validation_score * validation_weight
+            
+            # Extraction method quality
+            score += score_extraction_method(item.get('extraction_method', '')) * method_weight
+            
+            # Data completeness
+            score += score_data_completeness(item) * completeness_weight
+            
+            # Source reliability
+            score += score_source_reliability(item) * reliability_weight
+            
+            return min(score, 1.0)
         
-        return min(score, 1.0)
+        return calculate_quality_score
     
     def _score_extraction_method(self, method):
         """Score extraction method reliability"""
-        method_scores = {
-            'pdf': 0.9,
-            'bygglov': 0.95,
-            'table': 0.8,
-            'playwright': 0.7,
-            'ajax': 0.6,
-            'enhanced': 0.75,
-            'generic': 0.5
-        }
+        # Extractors emit a small, fixed set of method names, so the substring
+        # scan below runs once per distinct name
+        score = self._method_score_cache.get(method)
+        if score is not None:
+            return score
         
         method_lower = method.lower()
-        for key, score in method_scores.items():
-            if key in method_lower:
-                return score
+        # Merged items carry one 'merged_' prefix per merge round
+        while method_lower.startswith('merged_'):
+            method_lower = method_lower[len('merged_'):]
+        
+        score = self.method_scores.get(method_lower)
+        if score is None:
+            score = 0.4  # Default for unknown methods
+            for key, key_score in self.method_scores.items():
+                if key in method_lower:
+                    score = key_score
+                    break
         
-        return 0.4  # Default for unknown methods
+        self._method_score_cache[method] = score
+        return score
     
     def _score_data_completeness(self, item):
         """Score based on data completeness"""
-        important_fields = [
-            'fee_name', 'amount', 'currency', 'category', 'description',
-            'source_url', 'extraction_method', 'municipality'
-        ]
-        
-        present_fields = sum(1 for field in important_fields if item.get(field))
-        return present_fields / len(important_fields)
+        fields = self.IMPORTANT_FIELDS
+        present_fields = sum(map(truth, map(item.get, fields)))
+        return present_fields / len(fields)
     
     def _score_source_reliability(self, item):
         """Score source reliability"""
@@ -255,17 +494,23 @@ class EnhancedDuplicatesPipeline:
         
         return min(score, 1.0)
     
-    def _merge_items(self, existing_item, new_item):
+    def _merge_items(self, existing_item, new_item, existing_quality, new_quality):
         """Intelligently merge two similar items"""
         merged_item = existing_item.copy()
+        prefer_new_text = new_quality > existing_quality
         
         # Merge strategy: take the best value for each field
+        merge_policy = self.MERGE_POLICY
         for key, new_value in new_item.items():
-            if key not in merged_item or not merged_item[key]:
+            existing_value = merged_item.get(key)
+            if not existing_value:
                 # Take new value if existing is missing
                 merged_item[key] = new_value
-            elif new_value and len(str(new_value)) > len(str(merged_item[key])):
-                # Take new value if it's more detailed
+            elif (prefer_new_text and new_value and merge_policy.get(key) == 'text'
+                  and isinstance(new_value, str) and isinstance(existing_value, str)
+                  and not _within_edit_distance(new_value, existing_value, self.TEXT_MERGE_DISTANCE)):
+                # Take the higher-quality item's text unless it only differs
+                # from the existing text by a typo or casing
                 merged_item[key] = new_value
         
         # Merge validation metadata
@@ -284,34 +529,101 @@ class EnhancedDuplicatesPipeline:
             merged_item['validation'] = merged_validation
         
         # Update extraction metadata
-        merged_item['extraction_date'] = datetime.now().isoformat()
+        merged_item['extraction_date'] = self.timestamp.now()
         merged_item['extraction_method'] = f"merged_{existing_item.get('extraction_method', 'unknown')}"
         
         return merged_item
     
-    def _replace_item(self, old_item, new_item, fingerprints):
-        """Replace old item with new item in all fingerprint mappings"""
-        # Remove old fingerprints
-        old_fingerprints = self._create_fingerprints(old_item)
-        for fingerprint in old_fingerprints.values():
-            if fingerprint in self.seen_fees:
-                del self.seen_fees[fingerprint]
+    def _find_entry(self, fingerprint):
+        """Resolve a fingerprint to its canonical key and stored entry"""
+        # Exact hits usually land on a canonical key directly
+        entry = self.items_by_fingerprint.get(fingerprint)
+        if entry is not None:
+            return fingerprint, entry
+        
+        canonical = self.fingerprint_aliases.get(fingerprint)
+        if canonical is not None:
+            return canonical, self.items_by_fingerprint.get(canonical)
+        
+        # Only fingerprints the filter may have seen are looked up in the store
+        if self.fingerprint_store is not None and fingerprint in self.fingerprint_filter:
+            return self._load_entry(fingerprint)
+        return None, None
+    
+    def _load_entry(self, fingerprint):
+        """Load a fee stored by an earlier crawl into the in-memory tables"""
+        store = self.fingerprint_store
+        canonical_key = store.get('alias:' + fingerprint.hex(), fingerprint.hex())
+        stored = store.get('item:' + canonical_key)
+        if stored is None:
+            return None, None
+        
+        canonical = bytes.fromhex(canonical_key)
+        item, fingerprints = stored
+        entry = _SeenFee(item, fingerprints)
+        self.items_by_fingerprint[canonical] = entry
+        if canonical != fingerprint:
+            self.fingerprint_aliases[fingerprint] = canonical
+        return canonical, entry
+    
+    def _save_state(self):
+        """Write stored fees and aliases back for the next crawl"""
+        store = self.fingerprint_store
+        for canonical, entry in self.items_by_fingerprint.items():
+            store['item:' + canonical.hex()] = (dict(entry.item), entry.fingerprints)
+        for fingerprint, canonical in self.fingerprint_aliases.items():
+            store['alias:' + fingerprint.hex()] = canonical.hex()
+        store.close()
+        self.fingerprint_filter.close()
+    
+    def _replace_item(self, canonical, new_entry):
+        """Replace old item with new entry in all fingerprint mappings"""
+        # Remove old fingerprints, kept from when the old item was stored
+        old_entry = self.items_by_fingerprint.pop(canonical)
+        aliases = self.fingerprint_aliases
+        store = self.fingerprint_store
+        for fingerprint in set(old_entry.fingerprints.values()):
+            # Leave fingerprints that have since been linked to another group
+            if fingerprint != canonical and aliases.get(fingerprint, canonical) != canonical:
+                continue
+            aliases.pop(fingerprint, None)
+            if store is not None:
+                self.fingerprint_filter.remove(fingerprint)
+                store.pop('alias:' + fingerprint.hex(), None)
+        if store is not None:
+            store.pop('item:' + canonical.hex(), None)
         
         # Add new fingerprints
-        for fingerprint in fingerprints.values():
-            self.seen_fees[fingerprint] = new_item
+        self._store_entry(new_entry)
+    
+    def _store_entry(self, entry):
+        """Store an entry under its exact fingerprint and link its other fingerprints"""
+        canonical = entry.fingerprints['exact_match']
+        aliases = self.fingerprint_aliases
+        fingerprint_filter = self.fingerprint_filter
+        for fingerprint in set(entry.fingerprints.values()):
+            # Keep the Bloom filter in sync with the fingerprint tables
+            if (fingerprint_filter is not None and fingerprint not in aliases
+                    and fingerprint not in self.items_by_fingerprint):
+                fingerprint_filter.add(fingerprint)
+            if fingerprint != canonical:
+                aliases[fingerprint] = canonical
+        self.items_by_fingerprint[canonical] = entry
     
     def close_spider(self, spider):
         """Log duplicate detection statistics"""
-        total_processed = len(self.seen_fees) + self.duplicates_removed
+        total_processed = len(self.items_by_fingerprint) + self.duplicates_removed
         
         self.logger.info("=== Enhanced Duplicate Detection Statistics ===")
         self.logger.info(f"Total items processed: {total_processed}")
-        self.logger.info(f"Unique items kept: {len(self.seen_fees)}")
+        self.logger.info(f"Unique items kept: {len(self.items_by_fingerprint)}")
         self.logger.info(f"Duplicates removed: {self.duplicates_removed}")
         self.logger.info(f"Items merged: {self.duplicates_merged}")
         self.logger.info(f"Quality upgrades: {self.quality_upgrades}")
         
         if total_processed > 0:
             dedup_rate = (self.duplicates_removed / total_processed) * 100
-            self.logger.info(f"Deduplication rate: {dedup_rate:.1f}%") 
\ No newline at end of file
+            self.logger.info(f"Deduplication rate: {dedup_rate:.1f}%")
+        
+        if self.fingerprint_store is not None:
+            self._save_state() 
\ No newline at end of file
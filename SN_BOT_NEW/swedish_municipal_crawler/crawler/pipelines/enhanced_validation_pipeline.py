@@ -1,8 +1,60 @@
 import logging
 import re
-from datetime import datetime
+import sys
+from collections import Counter
+from functools import lru_cache
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - batch checks fall back to per-item
+    np = None
+from ..utils.timestamps import CoarseTimestamp
 from ..utils.validators import SwedishValidators
 
+# Amount tiers checked by the amount validation rule, in priority order
+AMOUNT_OK, AMOUNT_BELOW_MIN, AMOUNT_ABOVE_MAX, AMOUNT_LOW, AMOUNT_HIGH = range(5)
+
+# Distinct fee names / name+description pairs whose text scans are memoized
+VALIDATION_CACHE_SIZE = 10000
+
+
+def _amount_tier(amount, min_amount, max_amount):
+    """Classify an amount against the configured bounds and warning levels"""
+    if amount < min_amount:
+        return AMOUNT_BELOW_MIN
+    if amount > max_amount:
+        return AMOUNT_ABOVE_MAX
+    if amount < 50:
+        return AMOUNT_LOW
+    if amount > 100000:
+        return AMOUNT_HIGH
+    return AMOUNT_OK
+
+
+def _content_quality(fee_name_length, description_length, keyword_count):
+    """Score content quality from text lengths and Swedish keyword hits"""
+    content_score = 0.5  # Base score
+    
+    # Boost for longer, more descriptive names
+    if fee_name_length > 20:
+        content_score += 0.1
+    if description_length > 50:
+        content_score += 0.1
+    
+    # Boost for Swedish keywords
+    content_score += min(keyword_count * 0.1, 0.3)
+    
+    return min(content_score, 1.0)
+
+
+def _source_reliability(method_boost, is_pdf_source):
+    """Score source reliability from the extraction method boost and source type"""
+    reliability_score = 0.5 + method_boost  # Base score plus method boost
+    
+    if is_pdf_source:
+        reliability_score += 0.1
+    
+    return min(reliability_score, 1.0)
+
 class EnhancedValidationPipeline:
     """Enhanced validation pipeline with confidence scoring and detailed validation"""
     
@@ -15,14 +67,14 @@ class EnhancedValidationPipeline:
             'total_processed': 0,
             'total_valid': 0,
             'total_invalid': 0,
-            'validation_errors': {},
+            'validation_errors': Counter(),
             'confidence_distribution': {
                 'high': 0,    # >= 0.8
                 'medium': 0,  # 0.6 - 0.8
                 'low': 0      # < 0.6
             },
-            'extraction_methods': {},
-            'categories': {}
+            'extraction_methods': Counter(),
+            'categories': Counter()
         }
         
         # Validation rules with weights
@@ -77,18 +129,130 @@ class EnhancedValidationPipeline:
                 'navigation', 'menu', 'footer', 'header', 'sidebar'
             ]
         }
+        
+        # Rule validators keyed by rule name, all called as (item, config, ctx)
+        self._rule_dispatch = {
+            'required_fields': self._validate_required_fields,
+            'amount_validation': self._validate_amount,
+            'fee_name_validation': self._validate_fee_name,
+            'currency_validation': self._validate_currency,
+            'url_validation': self._validate_url,
+            'category_validation': self._validate_category
+        }
+        
+        # Rules in evaluation order with validator and weight resolved up front,
+        # so the per-item loop does no name or config lookups
+        self._rule_sequence = [
+            (rule_name, self._rule_dispatch.get(rule_name, self._validate_unknown_rule),
+             rule_config, rule_config['weight'])
+            for rule_name, rule_config in self.validation_rules.items()
+        ]
+        
+        # Compiled once here rather than looked up in re's cache per item
+        # Forbidden patterns are fused into one lookahead alternation so a fee
+        # name is scanned once; each pattern keeps its own group so overlapping
+        # hits are still reported per pattern
+        self._forbidden_patterns = self.validation_rules['fee_name_validation']['forbidden_patterns']
+        self._forbidden_re = re.compile(
+            '(?=' + '|'.join(f'({pattern})' for pattern in self._forbidden_patterns) + ')'
+        )
+        self._numeric_only_re = re.compile(r'^[\d\s\-_.,]+$')
+        self._http_re = re.compile(r'https?://')
+        self._invalid_content_re = re.compile(
+            '(?=(' + '|'.join(map(re.escape, self.swedish_patterns['invalid_content'])) + '))'
+        )
+        self._valid_keywords = frozenset(self.swedish_patterns['valid_fee_keywords'])
+        self._swedish_chars = frozenset('åäö')
+        self._allowed_currencies = frozenset(self.validation_rules['currency_validation']['allowed_currencies'])
+        self._kronor_aliases = frozenset(('kr', 'kronor'))
+        self._valid_categories = frozenset(self.validation_rules['category_validation']['valid_categories'])
+        
+        # Fee names and descriptions repeat across municipalities, so the text
+        # scans are memoized per instance (they depend on its compiled patterns)
+        self._scan_fee_name = lru_cache(maxsize=VALIDATION_CACHE_SIZE)(self._scan_fee_name)
+        self._scan_content = lru_cache(maxsize=VALIDATION_CACHE_SIZE)(self._scan_content)
+        
+        # Confidence buckets indexed by how many thresholds (0.6, 0.8) are met
+        self._confidence_buckets = ('low', 'medium', 'high')
+        
+        # Extraction method boosts, first matching tag wins. Confidence checks the
+        # method as given, reliability checks it lowercased; both are resolved
+        # once per distinct method string
+        self._method_confidence_boosts = (('playwright', 0.05), ('table', 0.1), ('pdf', 0.15))
+        self._method_reliability_boosts = (('pdf', 0.2), ('table', 0.15), ('playwright', 0.1))
+        self._method_boost_cache = {}
+        
+        # Every valid item is stamped; second resolution is enough
+        self.timestamp = CoarseTimestamp()
     
     def process_item(self, item, spider):
         """Process and validate an extracted fee item"""
+        # Normalize the text fields once for every validator
+        return self._process_with_context(item, self._build_context(item))
+    
+    def process_items_batch(self, items):
+        """Validate already collected items together, returning the valid ones
+        
+        Amount tiers and category lookups are computed column-wise with numpy
+        when it is installed; everything else runs per item as in process_item.
+        Invalid items are counted and logged like in process_item but left out
+        of the result instead of raising DropItem.
+        """
+        items = list(items)
+        contexts = [self._build_context(item) for item in items]
+        if np is not None and items:
+            self._precompute_batch_checks(items, contexts)
+        
+        valid_items = []
+        for item, ctx in zip(items, contexts):
+            try:
+                valid_items.append(self._process_with_context(item, ctx))
+            except DropItem:
+                continue
+        return valid_items
+    
+    def _precompute_batch_checks(self, items, contexts):
+        """Store vectorized amount tiers and category membership on each context"""
+        amount_config = self.validation_rules['amount_validation']
+        category_config = self.validation_rules['category_validation']
+        
+        parsed = []
+        for item in items:
+            try:
+                parsed.append(float(item.get('amount', 0)))
+            except (ValueError, TypeError, OverflowError):
+                parsed.append(None)  # left to _validate_amount to report
+        
+        amounts = np.array([np.nan if amount is None else amount for amount in parsed], dtype=np.float64)
+        tiers = np.select(
+            [amounts < amount_config['min_amount'], amounts > amount_config['max_amount'],
+             amounts < 50, amounts > 100000],
+            [AMOUNT_BELOW_MIN, AMOUNT_ABOVE_MAX, AMOUNT_LOW, AMOUNT_HIGH],
+            AMOUNT_OK
+        )
+        
+        categories = [str(item.get('category', '')).strip().lower() for item in items]
+        known = np.isin(np.array(categories, dtype=str), category_config['valid_categories'])
+        
+        for ctx, amount, tier, category, is_known in zip(contexts, parsed, tiers.tolist(),
+                                                          categories, known.tolist()):
+            if amount is not None:
+                ctx['amount'] = amount
+                ctx['amount_tier'] = tier
+            ctx['category'] = category
+            ctx['category_known'] = is_known
+    
+    def _process_with_context(self, item, ctx):
+        """Validate and enhance an item, raising DropItem if it is invalid"""
         self.stats['total_processed'] += 1
         
         try:
             # Perform comprehensive validation
-            validation_result = self._validate_item(item)
+            validation_result = self._validate_item(item, ctx)
             
             if validation_result['is_valid']:
                 # Enhance item with validation metadata
-                item = self._enhance_item(item, validation_result)
+                item = self._enhance_item(item, validation_result, ctx)
                 self.stats['total_valid'] += 1
                 
                 # Update statistics
@@ -108,7 +272,18 @@ class EnhancedValidationPipeline:
             self.stats['total_invalid'] += 1
             raise DropItem(f"Validation pipeline error: {e}")
     
-    def _validate_item(self, item):
+    def _build_context(self, item):
+        """Convert and lowercase the free-text fields shared by several validators"""
+        fee_name = str(item.get('fee_name', ''))
+        description = str(item.get('description', ''))
+        return {
+            'fee_name': fee_name,
+            'fee_name_lower': fee_name.lower(),
+            'description': description,
+            'description_lower': description.lower()
+        }
+    
+    def _validate_item(self, item, ctx):
         """Perform comprehensive validation on an item"""
         validation_result = {
             'is_valid': True,
@@ -118,33 +293,39 @@ class EnhancedValidationPipeline:
             'validation_scores': {}
         }
         
+        validation_scores = validation_result['validation_scores']
+        warnings = validation_result['warnings']
         total_weight = 0
         weighted_score = 0
         
-        # Apply each validation rule
-        for rule_name, rule_config in self.validation_rules.items():
-            rule_result = self._apply_validation_rule(item, rule_name, rule_config)
+        # Apply each validation rule. Rules only convert their inputs with str(),
+        # apart from the amount parsing which handles its own errors; anything
+        # unexpected is caught by process_item and drops the item
+        for rule_name, validator, rule_config, weight in self._rule_sequence:
+            rule_result = validator(item, rule_config, ctx)
             
-            validation_result['validation_scores'][rule_name] = rule_result
+            validation_scores[rule_name] = rule_result
             
             if rule_result['is_valid']:
-                weighted_score += rule_result['score'] * rule_config['weight']
+                weighted_score += rule_result['score'] * weight
             else:
                 validation_result['errors'].extend(rule_result['errors'])
                 if rule_result['critical']:
+                    # The item will be dropped, so skip the remaining rules
                     validation_result['is_valid'] = False
+                    return validation_result
             
             if rule_result['warnings']:
-                validation_result['warnings'].extend(rule_result['warnings'])
+                warnings.extend(rule_result['warnings'])
             
-            total_weight += rule_config['weight']
+            total_weight += weight
         
         # Calculate overall confidence score
         if total_weight > 0:
             validation_result['confidence_score'] = weighted_score / total_weight
         
         # Apply Swedish-specific validation
-        swedish_result = self._validate_swedish_content(item)
+        swedish_result = self._validate_swedish_content(item, ctx)
         validation_result['validation_scores']['swedish_content'] = swedish_result
         
         if not swedish_result['is_valid']:
@@ -153,42 +334,11 @@ class EnhancedValidationPipeline:
         
         return validation_result
     
-    def _apply_validation_rule(self, item, rule_name, rule_config):
-        """Apply a specific validation rule"""
-        result = {
-            'is_valid': True,
-            'score': 1.0,
-            'errors': [],
-            'warnings': [],
-            'critical': False
-        }
-        
-        try:
-            if rule_name == 'required_fields':
-                result = self._validate_required_fields(item, rule_config)
-            elif rule_name == 'amount_validation':
-                result = self._validate_amount(item, rule_config)
-            elif rule_name == 'fee_name_validation':
-                result = self._validate_fee_name(item, rule_config)
-            elif rule_name == 'currency_validation':
-                result = self._validate_currency(item, rule_config)
-            elif rule_name == 'url_validation':
-                result = self._validate_url(item, rule_config)
-            elif rule_name == 'category_validation':
-                result = self._validate_category(item, rule_config)
-        
-        except Exception as e:
-            result = {
-                'is_valid': False,
-                'score': 0.0,
-                'errors': [f"Validation rule {rule_name} failed: {e}"],
-                'warnings': [],
-                'critical': True
-            }
-        
-        return result
+    def _validate_unknown_rule(self, item, config, ctx):
+        """Pass rules that have no validator"""
+        return {'is_valid': True, 'score': 1.0, 'errors': [], 'warnings': [], 'critical': False}
     
-    def _validate_required_fields(self, item, config):
+    def _validate_required_fields(self, item, config, ctx):
         """Validate required fields are present"""
         result = {'is_valid': True, 'score': 1.0, 'errors': [], 'warnings': [], 'critical': True}
         
@@ -204,43 +354,47 @@ class EnhancedValidationPipeline:
         
         return result
     
-    def _validate_amount(self, item, config):
+    def _validate_amount(self, item, config, ctx):
         """Validate fee amount"""
         result = {'is_valid': True, 'score': 1.0, 'errors': [], 'warnings': [], 'critical': True}
         
-        try:
-            amount = float(item.get('amount', 0))
-            
-            if amount < config['min_amount']:
-                result['is_valid'] = False
-                result['errors'].append(f"Amount {amount} below minimum {config['min_amount']}")
-            elif amount > config['max_amount']:
-                result['is_valid'] = False
-                result['errors'].append(f"Amount {amount} above maximum {config['max_amount']}")
-            elif amount < 50:
-                result['warnings'].append(f"Amount {amount} is unusually low")
-                result['score'] = 0.7
-            elif amount > 100000:
-                result['warnings'].append(f"Amount {amount} is unusually high")
-                result['score'] = 0.8
-            
-            # Additional validation using validators
-            if not self.validators.validate_fee_amount(amount):
+        if 'amount_tier' in ctx:
+            amount, tier = ctx['amount'], ctx['amount_tier']
+        else:
+            try:
+                amount = float(item.get('amount', 0))
+            except (ValueError, TypeError, OverflowError):
                 result['is_valid'] = False
-                result['errors'].append(f"Amount {amount} failed validator check")
+                result['score'] = 0.0
+                result['errors'].append(f"Invalid amount format: {item.get('amount')}")
+                return result
+            tier = _amount_tier(amount, config['min_amount'], config['max_amount'])
         
-        except (ValueError, TypeError):
+        if tier == AMOUNT_BELOW_MIN:
             result['is_valid'] = False
-            result['score'] = 0.0
-            result['errors'].append(f"Invalid amount format: {item.get('amount')}")
+            result['errors'].append(f"Amount {amount} below minimum {config['min_amount']}")
+        elif tier == AMOUNT_ABOVE_MAX:
+            result['is_valid'] = False
+            result['errors'].append(f"Amount {amount} above maximum {config['max_amount']}")
+        elif tier == AMOUNT_LOW:
+            result['warnings'].append(f"Amount {amount} is unusually low")
+            result['score'] = 0.7
+        elif tier == AMOUNT_HIGH:
+            result['warnings'].append(f"Amount {amount} is unusually high")
+            result['score'] = 0.8
+        
+        # Additional validation using validators
+        if not self.validators.validate_fee_amount(amount):
+            result['is_valid'] = False
+            result['errors'].append(f"Amount {amount} failed validator check")
         
         return result
     
-    def _validate_fee_name(self, item, config):
+    def _validate_fee_name(self, item, config, ctx):
         """Validate fee name"""
         result = {'is_valid': True, 'score': 1.0, 'errors': [], 'warnings': [], 'critical': True}
         
-        fee_name = str(item.get('fee_name', '')).strip()
+        fee_name = ctx['fee_name'].strip()
         
         # Length validation
         if len(fee_name) < config['min_length']:
@@ -250,42 +404,50 @@ class EnhancedValidationPipeline:
             result['warnings'].append(f"Fee name very long: {len(fee_name)} > {config['max_length']}")
             result['score'] = 0.8
         
+        forbidden, numbers_only, has_keyword = self._scan_fee_name(fee_name, ctx['fee_name_lower'])
+        
         # Forbidden patterns
-        fee_name_lower = fee_name.lower()
-        for pattern in config['forbidden_patterns']:
-            if re.search(pattern, fee_name_lower):
-                result['is_valid'] = False
-                result['errors'].append(f"Fee name contains forbidden pattern: {pattern}")
+        for pattern in forbidden:
+            result['is_valid'] = False
+            result['errors'].append(f"Fee name contains forbidden pattern: {pattern}")
         
         # Check for meaningful content
-        if re.match(r'^[\d\s\-_.,]+$', fee_name):
+        if numbers_only:
             result['is_valid'] = False
             result['errors'].append("Fee name contains only numbers and punctuation")
         
         # Check for Swedish content
-        if not any(keyword in fee_name_lower for keyword in self.swedish_patterns['valid_fee_keywords']):
+        if not has_keyword:
             result['warnings'].append("Fee name doesn't contain common Swedish fee keywords")
             result['score'] = 0.7
         
         return result
     
-    def _validate_currency(self, item, config):
+    def _scan_fee_name(self, fee_name, fee_name_lower):
+        """Return (forbidden_patterns, numbers_only, has_keyword) for a stripped fee name"""
+        matched = {match.lastindex for match in self._forbidden_re.finditer(fee_name_lower)}
+        forbidden = tuple(self._forbidden_patterns[index - 1] for index in sorted(matched))
+        numbers_only = self._numeric_only_re.match(fee_name) is not None
+        has_keyword = any(keyword in fee_name_lower for keyword in self._valid_keywords)
+        return forbidden, numbers_only, has_keyword
+    
+    def _validate_currency(self, item, config, ctx):
         """Validate currency"""
         result = {'is_valid': True, 'score': 1.0, 'errors': [], 'warnings': [], 'critical': False}
         
         currency = str(item.get('currency', '')).strip()
         
-        if currency not in config['allowed_currencies']:
+        if currency not in self._allowed_currencies:
             result['warnings'].append(f"Unexpected currency: {currency}")
             result['score'] = 0.8
         
         # Normalize currency
-        if currency.lower() in ['kr', 'kronor']:
+        if currency.lower() in self._kronor_aliases:
             item['currency'] = 'SEK'
         
         return result
     
-    def _validate_url(self, item, config):
+    def _validate_url(self, item, config, ctx):
         """Validate source URL"""
         result = {'is_valid': True, 'score': 1.0, 'errors': [], 'warnings': [], 'critical': False}
         
@@ -302,148 +464,148 @@ class EnhancedValidationPipeline:
             result['score'] = 0.8
         
         # Basic URL format validation
-        if not re.match(r'https?://', url):
+        if not self._http_re.match(url):
             result['warnings'].append(f"URL missing protocol: {url}")
             result['score'] = 0.9
         
         return result
     
-    def _validate_category(self, item, config):
+    def _validate_category(self, item, config, ctx):
         """Validate category"""
         result = {'is_valid': True, 'score': 1.0, 'errors': [], 'warnings': [], 'critical': False}
         
-        category = str(item.get('category', '')).strip().lower()
+        if 'category_known' in ctx:
+            category, known = ctx['category'], ctx['category_known']
+        else:
+            category = str(item.get('category', '')).strip().lower()
+            known = category in self._valid_categories
         
-        if category and category not in config['valid_categories']:
+        if category and not known:
             result['warnings'].append(f"Unknown category: {category}")
             result['score'] = 0.9
         
         return result
     
-    def _validate_swedish_content(self, item):
+    def _validate_swedish_content(self, item, ctx):
         """Validate Swedish-specific content"""
         result = {'is_valid': True, 'score': 1.0, 'errors': [], 'warnings': []}
         
-        # Check fee name for Swedish characteristics
-        fee_name = str(item.get('fee_name', '')).lower()
-        description = str(item.get('description', '')).lower()
+        invalid_terms, lacks_swedish = self._scan_content(ctx['fee_name_lower'], ctx['description_lower'])
         
         # Check for invalid content
-        for invalid_term in self.swedish_patterns['invalid_content']:
-            if invalid_term in fee_name or invalid_term in description:
-                result['is_valid'] = False
-                result['errors'].append(f"Content contains invalid term: {invalid_term}")
-        
-        # Check for Swedish characters
-        swedish_chars = ['å', 'ä', 'ö']
-        has_swedish_chars = any(char in fee_name + description for char in swedish_chars)
+        if invalid_terms:
+            result['is_valid'] = False
+            result['errors'].extend(f"Content contains invalid term: {invalid_term}"
+                                    for invalid_term in invalid_terms)
         
-        if not has_swedish_chars and len(fee_name) > 20:
+        # Check fee name for Swedish characteristics
+        if lacks_swedish:
             result['warnings'].append("Content lacks Swedish characters")
             result['score'] = 0.8
         
         return result
     
-    def _enhance_item(self, item, validation_result):
+    def _scan_content(self, fee_name, description):
+        """Return (invalid_terms, lacks_swedish_chars) for lowercased name and description"""
+        found = {match.group(1) for match in self._invalid_content_re.finditer(f"{fee_name} {description}")}
+        invalid_terms = tuple(invalid_term for invalid_term in self.swedish_patterns['invalid_content']
+                              if invalid_term in found)
+        
+        # Swedish characters only matter for longer fee names
+        lacks_swedish = (len(fee_name) > 20 and self._swedish_chars.isdisjoint(fee_name)
+                         and self._swedish_chars.isdisjoint(description))
+        return invalid_terms, lacks_swedish
+    
+    def _enhance_item(self, item, validation_result, ctx):
         """Enhance item with validation metadata"""
-        # Add validation metadata
+        # Enhance confidence based on extraction method, capped at 1.0
+        confidence_boost, _ = self._method_boosts(item.get('extraction_method', ''))
+        
+        # Add validation metadata, built once with its final values
         item['validation'] = {
-            'confidence_score': validation_result['confidence_score'],
-            'validation_date': datetime.now().isoformat(),
+            'confidence_score': min(validation_result['confidence_score'] + confidence_boost, 1.0),
+            'validation_date': self.timestamp.now(),
             'validation_version': '2.0',
             'warnings': validation_result['warnings'],
             'validation_scores': validation_result['validation_scores']
         }
         
-        # Enhance confidence based on extraction method
-        extraction_method = item.get('extraction_method', '')
-        if 'playwright' in extraction_method:
-            item['validation']['confidence_score'] += 0.05
-        elif 'table' in extraction_method:
-            item['validation']['confidence_score'] += 0.1
-        elif 'pdf' in extraction_method:
-            item['validation']['confidence_score'] += 0.15
-        
-        # Cap confidence at 1.0
-        item['validation']['confidence_score'] = min(item['validation']['confidence_score'], 1.0)
-        
         # Add quality indicators
-        item['quality'] = self._calculate_quality_indicators(item, validation_result)
+        item['quality'] = self._calculate_quality_indicators(item, validation_result, ctx)
         
         return item
     
-    def _calculate_quality_indicators(self, item, validation_result):
+    def _method_boosts(self, extraction_method):
+        """Return (confidence_boost, reliability_boost) for an extraction method"""
+        boosts = self._method_boost_cache.get(extraction_method)
+        if boosts is None:
+            confidence_boost = next((boost for tag, boost in self._method_confidence_boosts
+                                     if tag in extraction_method), 0.0)
+            method_lower = extraction_method.lower()
+            reliability_boost = next((boost for tag, boost in self._method_reliability_boosts
+                                      if tag in method_lower), 0.0)
+            boosts = self._method_boost_cache[extraction_method] = (confidence_boost, reliability_boost)
+        return boosts
+    
+    def _calculate_quality_indicators(self, item, validation_result, ctx):
         """Calculate quality indicators for the item"""
-        quality = {
-            'overall_score': validation_result['confidence_score'],
-            'data_completeness': 0.0,
-            'content_quality': 0.0,
-            'source_reliability': 0.0
-        }
-        
-        # Data completeness
-        optional_fields = ['category', 'description', 'unit', 'extraction_method']
-        present_optional = sum(1 for field in optional_fields if item.get(field))
-        quality['data_completeness'] = present_optional / len(optional_fields)
+        # Data completeness over the four optional fields, each worth 0.25
+        get = item.get
+        present_optional = (bool(get('category')) + bool(get('description'))
+                            + bool(get('unit')) + bool(get('extraction_method')))
+        data_completeness = present_optional * 0.25
         
         # Content quality
-        fee_name = str(item.get('fee_name', ''))
-        description = str(item.get('description', ''))
-        
-        content_score = 0.5  # Base score
-        
-        # Boost for longer, more descriptive names
-        if len(fee_name) > 20:
-            content_score += 0.1
-        if len(description) > 50:
-            content_score += 0.1
-        
-        # Boost for Swedish keywords
-        swedish_keyword_count = sum(1 for keyword in self.swedish_patterns['valid_fee_keywords']
-                                  if keyword in fee_name.lower() or keyword in description.lower())
-        content_score += min(swedish_keyword_count * 0.1, 0.3)
-        
-        quality['content_quality'] = min(content_score, 1.0)
+        fee_name_lower = ctx['fee_name_lower']
+        description_lower = ctx['description_lower']
+        swedish_keyword_count = sum(1 for keyword in self._valid_keywords
+                                  if keyword in fee_name_lower or keyword in description_lower)
+        content_quality = _content_quality(
+            len(ctx['fee_name']), len(ctx['description']), swedish_keyword_count
+        )
         
         # Source reliability
-        extraction_method = item.get('extraction_method', '')
-        source_type = item.get('source_type', '')
-        
-        reliability_score = 0.5  # Base score
-        
-        if 'pdf' in extraction_method.lower():
-            reliability_score += 0.2
-        elif 'table' in extraction_method.lower():
-            reliability_score += 0.15
-        elif 'playwright' in extraction_method.lower():
-            reliability_score += 0.1
-        
-        if source_type == 'PDF':
-            reliability_score += 0.1
-        
-        quality['source_reliability'] = min(reliability_score, 1.0)
+        _, reliability_boost = self._method_boosts(item.get('extraction_method', ''))
+        source_reliability = _source_reliability(
+            reliability_boost, item.get('source_type', '') == 'PDF'
+        )
         
-        return quality
+        return {
+            'overall_score': validation_result['confidence_score'],
+            'data_completeness': data_completeness,
+            'content_quality': content_quality,
+            'source_reliability': source_reliability
+        }
     
     def _update_statistics(self, item, validation_result):
         """Update validation statistics"""
         confidence = validation_result['confidence_score']
         
         # Confidence distribution
-        if confidence >= 0.8:
-            self.stats['confidence_distribution']['high'] += 1
-        elif confidence >= 0.6:
-            self.stats['confidence_distribution']['medium'] += 1
-        else:
-            self.stats['confidence_distribution']['low'] += 1
+        bucket = self._confidence_buckets[(confidence >= 0.6) + (confidence >= 0.8)]
+        self.stats['confidence_distribution'][bucket] += 1
         
         # Extraction methods
-        method = item.get('extraction_method', 'unknown')
-        self.stats['extraction_methods'][method] = self.stats['extraction_methods'].get(method, 0) + 1
+        method = self._intern_field(item, 'extraction_method')
+        self.stats['extraction_methods'][method] += 1
         
         # Categories
-        category = item.get('category', 'unknown')
-        self.stats['categories'][category] = self.stats['categories'].get(category, 0) + 1
+        category = self._intern_field(item, 'category')
+        self.stats['categories'][category] += 1
+    
+    def _intern_field(self, item, field):
+        """Return a low-cardinality field interned, storing it back on the item
+        
+        Extraction methods and categories repeat across every item, so interned
+        values share one string object in the stats and in items held further
+        down the pipeline, and key comparisons become identity checks.
+        """
+        value = item.get(field, 'unknown')
+        if isinstance(value, str):
+            value = sys.intern(value)
+            if field in item:
+                item[field] = value
+        return value
     
     def _log_validation_failure(self, item, validation_result):
         """Log validation failure details"""
@@ -454,7 +616,7 @@ class EnhancedValidationPipeline:
             
             # Track error types
             error_type = error.split(':')[0] if ':' in error else error
-            self.stats['validation_errors'][error_type] = self.stats['validation_errors'].get(error_type, 0) + 1
+            self.stats['validation_errors'][error_type] += 1
     
     def close_spider(self, spider):
         """Log final validation statistics"""
@@ -474,21 +636,18 @@ class EnhancedValidationPipeline:
         
         # Top extraction methods
         self.logger.info("Extraction methods:")
-        for method, count in sorted(self.stats['extraction_methods'].items(), 
-                                  key=lambda x: x[1], reverse=True)[:5]:
+        for method, count in self.stats['extraction_methods'].most_common(5):
             self.logger.info(f"  {method}: {count}")
         
         # Top categories
         self.logger.info("Categories:")
-        for category, count in sorted(self.stats['categories'].items(), 
-                                    key=lambda x: x[1], reverse=True)[:5]:
+        for category, count in self.stats['categories'].most_common(5):
             self.logger.info(f"  {category}: {count}")
         
         # Top validation errors
         if self.stats['validation_errors']:
             self.logger.info("Top validation errors:")
-            for error, count in sorted(self.stats['validation_errors'].items(), 
-                                     key=lambda x: x[1], reverse=True)[:5]:
+            for error, count in self.stats['validation_errors'].most_common(5):
                 self.logger.info(f"  {error}: {count}")
 
 # Import DropItem for pipeline
@@ -9,20 +9,40 @@ Handles data export, storage, and reporting for Phase 1 specific data points:
 
 import csv
 import json
+import math
 import sqlite3
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Collection, Dict, List, Optional
 import statistics
 import os
+import time
+from bisect import bisect_right
+from collections import Counter
+
+from ..utils.timestamps import CoarseTimestamp
 
 try:
-    import pandas as pd
     import openpyxl
-    PANDAS_AVAILABLE = True
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    EXCEL_HEADER_FONT = Font(bold=True)
+    OPENPYXL_AVAILABLE = True
 except ImportError:
-    PANDAS_AVAILABLE = False
+    OPENPYXL_AVAILABLE = False
+
+# Encode JSON output with orjson when it is installed; both paths return UTF-8 bytes
+try:
+    import orjson
+    
+    def _dump_json(obj, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+except ImportError:
+    def _dump_json(obj, indent: bool = False) -> bytes:
+        if indent:
+            return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
 
 # Try to import SocketIO for real-time notifications
 try:
@@ -31,8 +51,199 @@ try:
 except ImportError:
     SOCKETIO_AVAILABLE = False
 
+# The database is rebuilt every run, so trade crash durability for write speed.
+# Connections run in autocommit mode and writes are grouped with explicit BEGIN.
+SQLITE_PRAGMAS = (
+    'journal_mode=WAL',
+    'synchronous=NORMAL',
+    'temp_store=MEMORY',
+    'cache_size=-65536',
+    'mmap_size=268435456'
+)
+
+# Phase 1 schema, created in a single transaction
+PHASE1_SCHEMA_SQL = '''
+    BEGIN;
+    
+    -- Main Phase 1 data table
+    CREATE TABLE IF NOT EXISTS phase1_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        municipality TEXT UNIQUE NOT NULL,
+        timtaxa_livsmedel INTEGER,
+        debitering_livsmedel TEXT,
+        timtaxa_bygglov INTEGER,
+        completeness_score REAL,
+        data_quality INTEGER,
+        source_url TEXT,
+        source_type TEXT,
+        extraction_date TEXT,
+        confidence REAL,
+        status TEXT,
+        validation_warnings TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- Indexes for the status filters and quality lookups the web interface runs
+    CREATE INDEX IF NOT EXISTS idx_phase1_status ON phase1_data(status);
+    CREATE INDEX IF NOT EXISTS idx_phase1_quality ON phase1_data(data_quality);
+    
+    -- Extraction statistics table
+    CREATE TABLE IF NOT EXISTS extraction_summary (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        metric TEXT NOT NULL,
+        value REAL,
+        description TEXT,
+        category TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- Field coverage table
+    CREATE TABLE IF NOT EXISTS field_coverage (
+        field_name TEXT PRIMARY KEY,
+        municipalities_with_field INTEGER,
+        total_municipalities INTEGER,
+        coverage_percentage REAL,
+        average_value REAL,
+        min_value REAL,
+        max_value REAL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- Quality distribution table
+    CREATE TABLE IF NOT EXISTS quality_distribution (
+        quality_tier TEXT PRIMARY KEY,
+        municipality_count INTEGER,
+        percentage REAL,
+        description TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    COMMIT;
+'''
+
+# One statement text for every batch so SQLite reuses its prepared statement.
+# Re-extracted municipalities are updated in place, keeping their id and created_at
+PHASE1_INSERT_SQL = '''
+    INSERT INTO phase1_data (
+        municipality, timtaxa_livsmedel, debitering_livsmedel,
+        timtaxa_bygglov, completeness_score, data_quality,
+        source_url, source_type, extraction_date, confidence,
+        status, validation_warnings, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(municipality) DO UPDATE SET
+        timtaxa_livsmedel = excluded.timtaxa_livsmedel,
+        debitering_livsmedel = excluded.debitering_livsmedel,
+        timtaxa_bygglov = excluded.timtaxa_bygglov,
+        completeness_score = excluded.completeness_score,
+        data_quality = excluded.data_quality,
+        source_url = excluded.source_url,
+        source_type = excluded.source_type,
+        extraction_date = excluded.extraction_date,
+        confidence = excluded.confidence,
+        status = excluded.status,
+        validation_warnings = excluded.validation_warnings,
+        updated_at = excluded.updated_at
+'''
+
+# Phase 1 data points tracked for coverage statistics
+PHASE1_VALUE_FIELDS = ('timtaxa_livsmedel', 'debitering_livsmedel', 'timtaxa_bygglov')
+TIMTAXA_FIELDS = ('timtaxa_livsmedel', 'timtaxa_bygglov')
+
+# Data quality tiers, indexed by how many of the lower bounds a score reaches
+QUALITY_TIER_BOUNDS = (50, 70, 90)
+QUALITY_TIERS = ('poor', 'fair', 'good', 'excellent')
+
+# Only the first error messages are kept for the summary; all errors are counted
+MAX_RECORDED_ERRORS = 1024
+
+def summarize_values(values: Collection[float]) -> Dict:
+    """Return count, min, max, average, median and sample std dev of non-empty values
+    
+    Mean, variance and range come from one Welford pass; the median needs
+    the sorted values.
+    """
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    lowest = highest = next(iter(values))
+    for value in values:
+        count += 1
+        delta = value - mean
+        mean += delta / count
+        m2 += delta * (value - mean)
+        if value < lowest:
+            lowest = value
+        elif value > highest:
+            highest = value
+    
+    return {
+        'count': count,
+        'min': lowest,
+        'max': highest,
+        'average': mean,
+        'median': statistics.median(values),
+        'std_dev': math.sqrt(m2 / (count - 1)) if count > 1 else 0
+    }
+
+def _export_default(value):
+    return value if value is not None else ''
+
+def _export_warnings(value):
+    if isinstance(value, list):
+        return '; '.join(value) if value else ''
+    return _export_default(value)
+
+def _export_date(value):
+    if not value:
+        return _export_default(value)
+    # Ensure consistent date format
+    try:
+        return value if isinstance(value, str) else str(value)
+    except Exception:
+        return datetime.now().isoformat()
+
+def _export_score(value):
+    # Round to 3 decimal places
+    return round(float(value), 3) if value is not None else ''
+
+def _export_quality(value):
+    # Round to 1 decimal place
+    return round(float(value), 1) if value is not None else ''
+
+def _excel_value(value):
+    """Return a value openpyxl can store, blanking missing values like pandas does"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def _excel_header(sheet, titles):
+    """Return bold header cells for a write-only worksheet"""
+    cells = []
+    for title in titles:
+        cell = WriteOnlyCell(sheet, value=title)
+        cell.font = EXCEL_HEADER_FONT
+        cells.append(cell)
+    return cells
+
+# Export formatting for fields that need more than None -> ''
+EXPORT_CONVERTERS = {
+    'validation_warnings': _export_warnings,
+    'extraction_date': _export_date,
+    'completeness_score': _export_score,
+    'confidence': _export_score,
+    'data_quality': _export_quality
+}
+
 class Phase1DataPipeline:
-    """Comprehensive data pipeline for Phase 1 municipal fee data"""
+    """Comprehensive data pipeline for Phase 1 municipal fee data
+    
+    Real-time notifications for the web interface are only written when the
+    PHASE1_RT_UI environment variable is set; the Phase 1 web app sets it for
+    the crawlers it starts. Without it no notification file is written.
+    """
     
     def __init__(self, output_dir: str = 'data/output'):
         self.logger = logging.getLogger(__name__)
@@ -41,11 +252,20 @@ class Phase1DataPipeline:
         
         # Data storage
         self.municipalities_data = {}
+        
+        # Running counts kept in step with municipalities_data, so progress
+        # logs and final statistics do not rescan every municipality. The
+        # Phase 1 data points are also kept column-wise (municipality -> value,
+        # present values only) for the coverage and timtaxa statistics
+        self._status_counts = Counter()
+        self._quality_counts = Counter()
+        self._field_values = {field: {} for field in PHASE1_VALUE_FIELDS}
         self.processing_stats = {
             'start_time': datetime.now(),
             'items_processed': 0,
             'items_exported': 0,
-            'errors': []
+            'errors': [],
+            'error_count': 0
         }
         
         # File paths with timestamp
@@ -61,8 +281,23 @@ class Phase1DataPipeline:
         self.csv_writer = None
         self.db_conn = None
         
-        # Real-time notification setup
+        # Database rows are buffered and written one transaction per batch. The
+        # web interface reads the database during the crawl, so a batch is also
+        # written once it is _flush_interval seconds old and on each progress log
+        self._pending_rows = []
+        self._batch_size = 50
+        self._flush_interval = 2.0
+        self._last_flush = time.monotonic()
+        
+        # Shared clock for updated_at and notification timestamps
+        self.timestamp = CoarseTimestamp()
+        
+        # Real-time notification setup. The web interface polls a single file,
+        # so rapid updates are coalesced and only the latest one is written
         self.socketio = None
+        self.notification_interval = 0.25
+        self._last_emit = 0.0
+        self._pending_emit = None
         self._setup_realtime_notifications()
         
         # Phase 1 specific field definitions
@@ -80,9 +315,23 @@ class Phase1DataPipeline:
             'status': 'Data status (complete/partial)',
             'validation_warnings': 'Validation warnings'
         }
+        
+        # Export column order and converter per field, resolved once instead of per item
+        self._fieldnames = tuple(self.phase1_fields)
+        self._export_converters = [
+            (field, EXPORT_CONVERTERS.get(field, _export_default))
+            for field in self._fieldnames
+        ]
     
     def _setup_realtime_notifications(self):
-        """Setup real-time notifications if SocketIO is available"""
+        """Setup real-time notifications if the web interface is listening"""
+        self._rt_enabled = bool(os.environ.get('PHASE1_RT_UI'))
+        if not self._rt_enabled:
+            # Nobody polls the notification file, so make updates a no-op
+            self._emit_realtime_update = lambda event_type, data: None
+            self.logger.debug("Real-time notifications disabled (PHASE1_RT_UI not set)")
+            return
+        
         try:
             # Try to connect to the web interface's SocketIO instance
             # This is a bit tricky since we're in a separate process
@@ -94,18 +343,30 @@ class Phase1DataPipeline:
     
     def _emit_realtime_update(self, event_type: str, data: Dict):
         """Emit real-time update via file-based notification system"""
+        self._pending_emit = {
+            'timestamp': self.timestamp.now(),
+            'event_type': event_type,
+            'data': data
+        }
+        
+        if time.monotonic() - self._last_emit >= self.notification_interval:
+            self._write_pending_notification()
+    
+    def _write_pending_notification(self):
+        """Write the latest pending notification for the web interface to pick up"""
+        notification, self._pending_emit = self._pending_emit, None
+        if notification is None:
+            return
+        
         try:
-            notification = {
-                'timestamp': datetime.now().isoformat(),
-                'event_type': event_type,
-                'data': data
-            }
+            # Replace the file atomically so the web interface never reads a partial write
+            tmp_path = self.notification_file.with_suffix('.json.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(_dump_json(notification))
+            os.replace(tmp_path, self.notification_file)
+            self._last_emit = time.monotonic()
             
-            # Write notification to file for web interface to pick up
-            with open(self.notification_file, 'w', encoding='utf-8') as f:
-                json.dump(notification, f, ensure_ascii=False)
-            
-            self.logger.debug(f"Real-time notification sent: {event_type}")
+            self.logger.debug(f"Real-time notification sent: {notification['event_type']}")
             
         except Exception as e:
             self.logger.debug(f"Error sending real-time notification: {e}")
@@ -124,92 +385,34 @@ class Phase1DataPipeline:
             spider.logger.info(f"Phase 1 outputs initialized:")
             spider.logger.info(f"  CSV: {self.csv_file_path}")
             spider.logger.info(f"  Database: {self.db_path}")
-            if PANDAS_AVAILABLE:
+            if OPENPYXL_AVAILABLE:
                 spider.logger.info(f"  Excel: {self.excel_file_path}")
             
         except Exception as e:
             spider.logger.error(f"Error initializing Phase 1 data pipeline: {e}")
-            self.processing_stats['errors'].append(f"Initialization error: {str(e)}")
+            self._record_error(f"Initialization error: {str(e)}")
     
     def _initialize_csv_output(self):
         """Initialize CSV output with Phase 1 specific columns"""
-        self.csv_file = open(self.csv_file_path, 'w', newline='', encoding='utf-8')
+        # Large buffer so rows reach the disk in big writes; closing flushes it
+        self.csv_file = open(self.csv_file_path, 'w', newline='', encoding='utf-8', buffering=1 << 20)
         
-        fieldnames = list(self.phase1_fields.keys())
-        self.csv_writer = csv.DictWriter(self.csv_file, fieldnames=fieldnames)
-        self.csv_writer.writeheader()
+        self.csv_writer = csv.writer(self.csv_file)
+        self.csv_writer.writerow(self._fieldnames)
         
         self.logger.info(f"CSV output initialized: {self.csv_file_path}")
     
     def _initialize_database(self):
         """Initialize SQLite database with Phase 1 schema"""
-        self.db_conn = sqlite3.connect(self.db_path)
+        self.db_conn = sqlite3.connect(self.db_path, isolation_level=None)
+        for pragma in SQLITE_PRAGMAS:
+            self.db_conn.execute(f"PRAGMA {pragma}")
         self._create_phase1_schema()
         self.logger.info(f"Database initialized: {self.db_path}")
     
     def _create_phase1_schema(self):
         """Create Phase 1 specific database schema"""
-        cursor = self.db_conn.cursor()
-        
-        # Main Phase 1 data table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS phase1_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                municipality TEXT UNIQUE NOT NULL,
-                timtaxa_livsmedel INTEGER,
-                debitering_livsmedel TEXT,
-                timtaxa_bygglov INTEGER,
-                completeness_score REAL,
-                data_quality INTEGER,
-                source_url TEXT,
-                source_type TEXT,
-                extraction_date TEXT,
-                confidence REAL,
-                status TEXT,
-                validation_warnings TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Extraction statistics table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS extraction_summary (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                metric TEXT NOT NULL,
-                value REAL,
-                description TEXT,
-                category TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Field coverage table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS field_coverage (
-                field_name TEXT PRIMARY KEY,
-                municipalities_with_field INTEGER,
-                total_municipalities INTEGER,
-                coverage_percentage REAL,
-                average_value REAL,
-                min_value REAL,
-                max_value REAL,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Quality distribution table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS quality_distribution (
-                quality_tier TEXT PRIMARY KEY,
-                municipality_count INTEGER,
-                percentage REAL,
-                description TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        self.db_conn.commit()
+        self.db_conn.executescript(PHASE1_SCHEMA_SQL)
         self.logger.debug("Phase 1 database schema created")
     
     def process_item(self, item, spider):
@@ -223,14 +426,15 @@ class Phase1DataPipeline:
                 return item
             
             # Store in memory for analysis
-            self.municipalities_data[municipality] = dict(item)
+            previous = self.municipalities_data.get(municipality)
+            current = self.municipalities_data[municipality] = dict(item)
+            self._update_running_counts(municipality, previous, current)
             
             # Prepare item for export (clean up complex fields)
             export_item = self._prepare_item_for_export(item)
             
-            # Write to CSV
-            self.csv_writer.writerow(export_item)
-            self.csv_file.flush()
+            # Write to CSV (export_item is already in column order)
+            self.csv_writer.writerow(export_item.values())
             
             # Write to database
             self._insert_to_database(export_item)
@@ -259,56 +463,54 @@ class Phase1DataPipeline:
         except Exception as e:
             error_msg = f"Error processing item for {item.get('municipality', 'unknown')}: {e}"
             self.logger.error(error_msg)
-            self.processing_stats['errors'].append(error_msg)
+            self._record_error(error_msg)
             return item
     
+    def _record_error(self, message: str):
+        """Count an error, keeping its message if fewer than MAX_RECORDED_ERRORS are kept"""
+        self.processing_stats['error_count'] += 1
+        errors = self.processing_stats['errors']
+        if len(errors) < MAX_RECORDED_ERRORS:
+            errors.append(message)
+    
+    def _update_running_counts(self, municipality: str, previous: Optional[Dict], current: Dict):
+        """Move a municipality's contribution to the running counts from its previous data"""
+        if previous is not None:
+            self._status_counts[previous.get('status')] -= 1
+            self._quality_counts[self._quality_tier(previous)] -= 1
+        
+        self._status_counts[current.get('status')] += 1
+        self._quality_counts[self._quality_tier(current)] += 1
+        
+        for field, values in self._field_values.items():
+            value = current.get(field)
+            if value:
+                values[municipality] = value
+            else:
+                values.pop(municipality, None)
+    
+    @staticmethod
+    def _quality_tier(municipality_data: Dict) -> str:
+        """Return the quality tier name for a municipality's data_quality score"""
+        return QUALITY_TIERS[bisect_right(QUALITY_TIER_BOUNDS, municipality_data.get('data_quality') or 0)]
+    
+    def _quality_distribution(self) -> Dict[str, int]:
+        """Return municipality counts per quality tier, best tier first"""
+        return {tier: self._quality_counts[tier] for tier in reversed(QUALITY_TIERS)}
+    
     def _prepare_item_for_export(self, item: Dict) -> Dict:
         """Prepare item for export by cleaning and formatting fields"""
-        export_item = {}
-        
-        for field in self.phase1_fields.keys():
-            value = item.get(field)
-            
-            # Handle special field formatting
-            if field == 'validation_warnings' and isinstance(value, list):
-                export_item[field] = '; '.join(value) if value else ''
-            elif field == 'extraction_date' and value:
-                # Ensure consistent date format
-                try:
-                    if isinstance(value, str):
-                        export_item[field] = value
-                    else:
-                        export_item[field] = str(value)
-                except:
-                    export_item[field] = datetime.now().isoformat()
-            elif field in ['completeness_score', 'confidence'] and value is not None:
-                # Round to 3 decimal places
-                export_item[field] = round(float(value), 3)
-            elif field == 'data_quality' and value is not None:
-                # Round to 1 decimal place
-                export_item[field] = round(float(value), 1)
-            else:
-                export_item[field] = value if value is not None else ''
-        
-        return export_item
+        get = item.get
+        return {field: convert(get(field)) for field, convert in self._export_converters}
     
     def _insert_to_database(self, item: Dict):
-        """Insert Phase 1 data into database"""
-        cursor = self.db_conn.cursor()
-        
+        """Queue Phase 1 data for the database, writing a batch when it is full"""
         # Convert validation_warnings to string if it's a list
         validation_warnings = item.get('validation_warnings', '')
         if isinstance(validation_warnings, list):
             validation_warnings = '; '.join(validation_warnings)
         
-        cursor.execute('''
-            INSERT OR REPLACE INTO phase1_data (
-                municipality, timtaxa_livsmedel, debitering_livsmedel,
-                timtaxa_bygglov, completeness_score, data_quality,
-                source_url, source_type, extraction_date, confidence,
-                status, validation_warnings, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        self._pending_rows.append((
             item.get('municipality'),
             item.get('timtaxa_livsmedel'),
             item.get('debitering_livsmedel'),
@@ -321,22 +523,37 @@ class Phase1DataPipeline:
             item.get('confidence'),
             item.get('status'),
             validation_warnings,
-            datetime.now().isoformat()
+            self.timestamp.now()
         ))
         
-        self.db_conn.commit()
+        if (len(self._pending_rows) >= self._batch_size
+                or time.monotonic() - self._last_flush >= self._flush_interval):
+            self._flush_pending_rows()
+    
+    def _flush_pending_rows(self):
+        """Write buffered Phase 1 rows in a single transaction"""
+        if not self._pending_rows or not self.db_conn:
+            return
+        
+        with self.db_conn:
+            self.db_conn.execute('BEGIN')
+            self.db_conn.executemany(PHASE1_INSERT_SQL, self._pending_rows)
+        
+        self._pending_rows.clear()
+        self._last_flush = time.monotonic()
     
     def _log_progress(self, spider):
         """Log processing progress with real-time updates"""
         total = self.processing_stats['items_processed']
-        complete = sum(1 for m in self.municipalities_data.values() 
-                      if m.get('status') == 'complete')
-        partial = sum(1 for m in self.municipalities_data.values() 
-                     if m.get('status') == 'partial')
+        complete = self._status_counts['complete']
+        partial = self._status_counts['partial']
         
         spider.logger.info(f"Phase 1 Progress: {total} municipalities processed, "
                           f"{complete} complete, {partial} partial")
         
+        # Make the rows so far visible to the web interface
+        self._flush_pending_rows()
+        
         # Emit real-time progress update
         self._emit_realtime_update('progress_update', {
             'total_municipalities': total,
@@ -355,29 +572,37 @@ class Phase1DataPipeline:
             if self.csv_file:
                 self.csv_file.close()
             
+            # Write remaining rows before any reporting, so a failing report
+            # cannot lose them
+            self._flush_pending_rows()
+            
+            # Send the last coalesced real-time update
+            self._write_pending_notification()
+            
             # Generate comprehensive statistics
             self._generate_phase1_statistics(spider)
             
             # Generate comparison report
             self._generate_comparison_report(spider)
             
-            # Generate Excel report if pandas is available
-            if PANDAS_AVAILABLE:
+            # Generate Excel report if openpyxl is available
+            if OPENPYXL_AVAILABLE:
                 self._generate_excel_report(spider)
             
             # Update database with final statistics
             self._update_database_statistics()
             
-            # Close database connection
-            if self.db_conn:
-                self.db_conn.close()
-            
             # Log final summary
             self._log_final_summary(spider)
             
         except Exception as e:
             spider.logger.error(f"Error finalizing Phase 1 data pipeline: {e}")
-            self.processing_stats['errors'].append(f"Finalization error: {str(e)}")
+            self._record_error(f"Finalization error: {str(e)}")
+        
+        finally:
+            # Close database connection
+            if self.db_conn:
+                self.db_conn.close()
     
     def _generate_phase1_statistics(self, spider):
         """Generate comprehensive Phase 1 statistics"""
@@ -388,51 +613,33 @@ class Phase1DataPipeline:
         
         # Calculate field coverage
         field_coverage = {}
-        for field in ['timtaxa_livsmedel', 'debitering_livsmedel', 'timtaxa_bygglov']:
-            values = [m.get(field) for m in self.municipalities_data.values() if m.get(field)]
+        for field in PHASE1_VALUE_FIELDS:
+            count = len(self._field_values[field])
             field_coverage[field] = {
-                'count': len(values),
-                'percentage': (len(values) / total) * 100,
-                'values': values
+                'count': count,
+                'percentage': (count / total) * 100
             }
         
         # Calculate quality distribution
-        quality_distribution = {'excellent': 0, 'good': 0, 'fair': 0, 'poor': 0}
-        for municipality_data in self.municipalities_data.values():
-            quality = municipality_data.get('data_quality', 0)
-            if quality >= 90:
-                quality_distribution['excellent'] += 1
-            elif quality >= 70:
-                quality_distribution['good'] += 1
-            elif quality >= 50:
-                quality_distribution['fair'] += 1
-            else:
-                quality_distribution['poor'] += 1
+        quality_distribution = self._quality_distribution()
         
         # Calculate timtaxa statistics
         timtaxa_stats = {}
-        for field in ['timtaxa_livsmedel', 'timtaxa_bygglov']:
-            values = field_coverage[field]['values']
+        for field in TIMTAXA_FIELDS:
+            values = self._field_values[field].values()
             if values:
-                timtaxa_stats[field] = {
-                    'count': len(values),
-                    'min': min(values),
-                    'max': max(values),
-                    'average': statistics.mean(values),
-                    'median': statistics.median(values),
-                    'std_dev': statistics.stdev(values) if len(values) > 1 else 0
-                }
+                timtaxa_stats[field] = summarize_values(values)
         
         # Calculate debitering distribution
-        debitering_values = field_coverage['debitering_livsmedel']['values']
+        debitering_counts = Counter(self._field_values['debitering_livsmedel'].values())
         debitering_distribution = {
-            'förskott': debitering_values.count('förskott'),
-            'efterhand': debitering_values.count('efterhand')
+            'förskott': debitering_counts['förskott'],
+            'efterhand': debitering_counts['efterhand']
         }
         
         # Calculate completeness analysis values
-        complete_data = sum(1 for m in self.municipalities_data.values() if m.get('status') == 'complete')
-        partial_data = sum(1 for m in self.municipalities_data.values() if m.get('status') == 'partial')
+        complete_data = self._status_counts['complete']
+        partial_data = self._status_counts['partial']
         
         # Compile comprehensive statistics
         stats = {
@@ -442,7 +649,7 @@ class Phase1DataPipeline:
                 'processing_time_minutes': (datetime.now() - self.processing_stats['start_time']).total_seconds() / 60,
                 'items_processed': self.processing_stats['items_processed'],
                 'items_exported': self.processing_stats['items_exported'],
-                'errors_count': len(self.processing_stats['errors'])
+                'errors_count': self.processing_stats['error_count']
             },
             'completeness_analysis': {
                 'complete_data': complete_data,
@@ -477,8 +684,8 @@ class Phase1DataPipeline:
         }
         
         # Save statistics to JSON
-        with open(self.stats_file_path, 'w', encoding='utf-8') as f:
-            json.dump(stats, f, indent=2, ensure_ascii=False)
+        with open(self.stats_file_path, 'wb') as f:
+            f.write(_dump_json(stats, indent=True))
         
         spider.logger.info(f"Phase 1 statistics saved: {self.stats_file_path}")
         return stats
@@ -486,7 +693,7 @@ class Phase1DataPipeline:
     def _generate_comparison_report(self, spider):
         """Generate municipality comparison report for Phase 1 data"""
         try:
-            with open(self.comparison_file_path, 'w', newline='', encoding='utf-8') as f:
+            with open(self.comparison_file_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
                 writer = csv.writer(f)
                 
                 # Header
@@ -502,11 +709,9 @@ class Phase1DataPipeline:
                     'Confidence'
                 ])
                 
-                # Sort municipalities by name
-                for municipality in sorted(self.municipalities_data.keys()):
-                    data = self.municipalities_data[municipality]
-                    
-                    writer.writerow([
+                # Sort municipalities by name and let the csv module consume the rows
+                writer.writerows(
+                    (
                         municipality,
                         data.get('timtaxa_livsmedel', 'Missing'),
                         data.get('debitering_livsmedel', 'Missing'),
@@ -516,7 +721,9 @@ class Phase1DataPipeline:
                         data.get('status', 'Unknown'),
                         data.get('source_type', 'Unknown'),
                         f"{data.get('confidence', 0):.2f}"
-                    ])
+                    )
+                    for municipality, data in sorted(self.municipalities_data.items())
+                )
             
             spider.logger.info(f"Comparison report saved: {self.comparison_file_path}")
             
@@ -524,69 +731,50 @@ class Phase1DataPipeline:
             spider.logger.error(f"Error generating comparison report: {e}")
     
     def _generate_excel_report(self, spider):
-        """Generate Excel report with multiple sheets"""
-        if not PANDAS_AVAILABLE:
-            spider.logger.warning("Pandas not available - skipping Excel report")
+        """Generate Excel report with multiple sheets
+        
+        Rows are streamed through a write-only workbook, so the report never
+        holds more than the row being written alongside municipalities_data.
+        """
+        if not OPENPYXL_AVAILABLE:
+            spider.logger.warning("openpyxl not available - skipping Excel report")
             return
         
         try:
-            # Create Excel writer
-            with pd.ExcelWriter(self.excel_file_path, engine='openpyxl') as writer:
-                
-                # Main data sheet
-                df_main = pd.DataFrame.from_dict(self.municipalities_data, orient='index')
-                df_main.index.name = 'Municipality'
-                df_main.to_excel(writer, sheet_name='Phase1_Data')
-                
-                # Summary statistics sheet
-                summary_data = []
-                total = len(self.municipalities_data)
-                
-                # Field coverage summary
-                for field in ['timtaxa_livsmedel', 'debitering_livsmedel', 'timtaxa_bygglov']:
-                    count = sum(1 for m in self.municipalities_data.values() if m.get(field))
-                    summary_data.append({
-                        'Metric': f'{field} Coverage',
-                        'Value': count,
-                        'Percentage': f"{(count/total)*100:.1f}%" if total > 0 else "0%"
-                    })
-                
-                # Quality distribution
-                quality_dist = {'excellent': 0, 'good': 0, 'fair': 0, 'poor': 0}
-                for m in self.municipalities_data.values():
-                    quality = m.get('data_quality', 0)
-                    if quality >= 90:
-                        quality_dist['excellent'] += 1
-                    elif quality >= 70:
-                        quality_dist['good'] += 1
-                    elif quality >= 50:
-                        quality_dist['fair'] += 1
-                    else:
-                        quality_dist['poor'] += 1
-                
-                for tier, count in quality_dist.items():
-                    summary_data.append({
-                        'Metric': f'Quality - {tier.capitalize()}',
-                        'Value': count,
-                        'Percentage': f"{(count/total)*100:.1f}%" if total > 0 else "0%"
-                    })
-                
-                df_summary = pd.DataFrame(summary_data)
-                df_summary.to_excel(writer, sheet_name='Summary', index=False)
-                
-                # Timtaxa analysis sheet
-                timtaxa_data = []
-                for municipality, data in self.municipalities_data.items():
-                    timtaxa_data.append({
-                        'Municipality': municipality,
-                        'Timtaxa_Livsmedel': data.get('timtaxa_livsmedel'),
-                        'Timtaxa_Bygglov': data.get('timtaxa_bygglov'),
-                        'Difference': (data.get('timtaxa_livsmedel', 0) or 0) - (data.get('timtaxa_bygglov', 0) or 0) if data.get('timtaxa_livsmedel') and data.get('timtaxa_bygglov') else None
-                    })
-                
-                df_timtaxa = pd.DataFrame(timtaxa_data)
-                df_timtaxa.to_excel(writer, sheet_name='Timtaxa_Analysis', index=False)
+            workbook = openpyxl.Workbook(write_only=True)
+            total = len(self.municipalities_data)
             
+            # Main data sheet, with every field seen on any municipality
+            columns = list(dict.fromkeys(
+                field for data in self.municipalities_data.values() for field in data
+            ))
+            sheet = workbook.create_sheet('Phase1_Data')
+            sheet.append(_excel_header(sheet, ['Municipality', *columns]))
+            for municipality, data in self.municipalities_data.items():
+                get = data.get
+                sheet.append([municipality, *(_excel_value(get(field)) for field in columns)])
+            
+            # Summary statistics sheet: field coverage, then quality distribution
+            sheet = workbook.create_sheet('Summary')
+            sheet.append(_excel_header(sheet, ['Metric', 'Value', 'Percentage']))
+            summary_rows = [(f'{field} Coverage', len(self._field_values[field])) for field in PHASE1_VALUE_FIELDS]
+            summary_rows.extend(
+                (f'Quality - {tier.capitalize()}', count)
+                for tier, count in self._quality_distribution().items()
+            )
+            for metric, count in summary_rows:
+                sheet.append([metric, count, f"{(count/total)*100:.1f}%" if total > 0 else "0%"])
+            
+            # Timtaxa analysis sheet; the difference is only shown when both rates are present
+            sheet = workbook.create_sheet('Timtaxa_Analysis')
+            sheet.append(_excel_header(sheet, ['Municipality', 'Timtaxa_Livsmedel', 'Timtaxa_Bygglov', 'Difference']))
+            for municipality, data in self.municipalities_data.items():
+                livsmedel = _excel_value(data.get('timtaxa_livsmedel'))
+                bygglov = _excel_value(data.get('timtaxa_bygglov'))
+                difference = livsmedel - bygglov if livsmedel and bygglov else None
+                sheet.append([municipality, livsmedel, bygglov, difference])
+            
+            workbook.save(self.excel_file_path)
             spider.logger.info(f"Excel report saved: {self.excel_file_path}")
             
         except Exception as e:
@@ -600,6 +788,7 @@ class Phase1DataPipeline:
         try:
             cursor = self.db_conn.cursor()
             total = len(self.municipalities_data)
+            cursor.execute('BEGIN')
             
             # Clear existing statistics
             cursor.execute("DELETE FROM extraction_summary")
@@ -609,75 +798,58 @@ class Phase1DataPipeline:
             # Insert extraction summary
             summary_metrics = [
                 ('total_municipalities', total, 'Total municipalities processed', 'general'),
-                ('complete_items', sum(1 for m in self.municipalities_data.values() if m.get('status') == 'complete'), 'Municipalities with complete data', 'completeness'),
-                ('partial_items', sum(1 for m in self.municipalities_data.values() if m.get('status') == 'partial'), 'Municipalities with partial data', 'completeness'),
+                ('complete_items', self._status_counts['complete'], 'Municipalities with complete data', 'completeness'),
+                ('partial_items', self._status_counts['partial'], 'Municipalities with partial data', 'completeness'),
                 ('processing_time', (datetime.now() - self.processing_stats['start_time']).total_seconds() / 60, 'Processing time in minutes', 'performance')
             ]
+            cursor.executemany(
+                "INSERT INTO extraction_summary (metric, value, description, category) VALUES (?, ?, ?, ?)",
+                summary_metrics
+            )
             
-            for metric, value, description, category in summary_metrics:
-                cursor.execute(
-                    "INSERT INTO extraction_summary (metric, value, description, category) VALUES (?, ?, ?, ?)",
-                    (metric, value, description, category)
-                )
-            
-            # Insert field coverage
-            for field in ['timtaxa_livsmedel', 'debitering_livsmedel', 'timtaxa_bygglov']:
-                values = [m.get(field) for m in self.municipalities_data.values() if m.get(field)]
+            # Insert field coverage, with value statistics for the numeric fields
+            coverage_rows = []
+            for field in PHASE1_VALUE_FIELDS:
+                values = self._field_values[field].values()
                 count = len(values)
-                
-                # Calculate statistics for numeric fields
-                avg_value = None
-                min_value = None
-                max_value = None
-                
-                if field in ['timtaxa_livsmedel', 'timtaxa_bygglov'] and values:
-                    avg_value = statistics.mean(values)
-                    min_value = min(values)
-                    max_value = max(values)
-                
-                cursor.execute('''
-                    INSERT INTO field_coverage 
-                    (field_name, municipalities_with_field, total_municipalities, coverage_percentage, average_value, min_value, max_value)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (field, count, total, (count/total)*100 if total > 0 else 0, avg_value, min_value, max_value))
+                summary = summarize_values(values) if field in TIMTAXA_FIELDS and values else {}
+                coverage_rows.append((
+                    field, count, total, (count/total)*100 if total > 0 else 0,
+                    summary.get('average'), summary.get('min'), summary.get('max')
+                ))
+            cursor.executemany('''
+                INSERT INTO field_coverage 
+                (field_name, municipalities_with_field, total_municipalities, coverage_percentage, average_value, min_value, max_value)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', coverage_rows)
             
             # Insert quality distribution
-            quality_dist = {'excellent': 0, 'good': 0, 'fair': 0, 'poor': 0}
-            for m in self.municipalities_data.values():
-                quality = m.get('data_quality', 0)
-                if quality >= 90:
-                    quality_dist['excellent'] += 1
-                elif quality >= 70:
-                    quality_dist['good'] += 1
-                elif quality >= 50:
-                    quality_dist['fair'] += 1
-                else:
-                    quality_dist['poor'] += 1
-            
             quality_descriptions = {
                 'excellent': 'Data quality 90-100%',
                 'good': 'Data quality 70-89%',
                 'fair': 'Data quality 50-69%',
                 'poor': 'Data quality <50%'
             }
-            
-            for tier, count in quality_dist.items():
-                cursor.execute(
-                    "INSERT INTO quality_distribution (quality_tier, municipality_count, percentage, description) VALUES (?, ?, ?, ?)",
+            cursor.executemany(
+                "INSERT INTO quality_distribution (quality_tier, municipality_count, percentage, description) VALUES (?, ?, ?, ?)",
+                [
                     (tier, count, (count/total)*100 if total > 0 else 0, quality_descriptions[tier])
-                )
+                    for tier, count in self._quality_distribution().items()
+                ]
+            )
             
             self.db_conn.commit()
             self.logger.debug("Database statistics updated")
             
         except Exception as e:
+            self.db_conn.rollback()
             self.logger.error(f"Error updating database statistics: {e}")
     
     def _log_final_summary(self, spider):
         """Log final processing summary"""
         total = len(self.municipalities_data)
-        complete = sum(1 for m in self.municipalities_data.values() if m.get('status') == 'complete')
-        partial = sum(1 for m in self.municipalities_data.values() if m.get('status') == 'partial')
+        complete = self._status_counts['complete']
+        partial = self._status_counts['partial']
         processing_time = (datetime.now() - self.processing_stats['start_time']).total_seconds() / 60
         
         spider.logger.info("=== Phase 1 Data Pipeline Final Summary ===")
@@ -687,22 +859,22 @@ class Phase1DataPipeline:
         spider.logger.info(f"Partial data: {partial} ({partial/total*100:.1f}%)" if total > 0 else "Partial data: 0")
         spider.logger.info(f"Items processed: {self.processing_stats['items_processed']}")
         spider.logger.info(f"Items exported: {self.processing_stats['items_exported']}")
-        spider.logger.info(f"Errors encountered: {len(self.processing_stats['errors'])}")
+        spider.logger.info(f"Errors encountered: {self.processing_stats['error_count']}")
         
         spider.logger.info(f"\nGenerated files:")
         spider.logger.info(f"  CSV: {self.csv_file_path}")
         spider.logger.info(f"  Database: {self.db_path}")
         spider.logger.info(f"  Statistics: {self.stats_file_path}")
         spider.logger.info(f"  Comparison: {self.comparison_file_path}")
-        if PANDAS_AVAILABLE:
+        if OPENPYXL_AVAILABLE:
             spider.logger.info(f"  Excel: {self.excel_file_path}")
         
         if self.processing_stats['errors']:
             spider.logger.warning(f"Errors encountered during processing:")
             for error in self.processing_stats['errors'][:5]:  # Show first 5 errors
                 spider.logger.warning(f"  - {error}")
-            if len(self.processing_stats['errors']) > 5:
-                spider.logger.warning(f"  ... and {len(self.processing_stats['errors']) - 5} more errors")
+            if self.processing_stats['error_count'] > 5:
+                spider.logger.warning(f"  ... and {self.processing_stats['error_count'] - 5} more errors")
         
         spider.logger.info("=== End Phase 1 Data Pipeline Summary ===")
 
@@ -715,13 +887,13 @@ def export_phase1_data_to_csv(municipalities_data: Dict, output_path: str) -> bo
             'source_url', 'confidence', 'status'
         ]
         
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for municipality, data in municipalities_data.items():
-                row = {field: data.get(field, '') for field in fieldnames}
-                writer.writerow(row)
+        with open(output_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            writer.writerows(
+                [data.get(field, '') for field in fieldnames]
+                for data in municipalities_data.values()
+            )
         
         return True
     except Exception as e:
@@ -6,7 +6,9 @@ Ensures one entry per municipality for Phase 1 data and keeps the highest qualit
 
 import logging
 import hashlib
-from datetime import datetime
+import re
+from collections import namedtuple
+from functools import lru_cache
 try:
     from scrapy.exceptions import DropItem
 except Exception:  # pragma: no cover - fallback if Scrapy is missing
@@ -14,12 +16,108 @@ except Exception:  # pragma: no cover - fallback if Scrapy is missing
         pass
 from typing import Dict, Optional
 
+from ..utils.timestamps import CoarseTimestamp
+
+# Municipality name normalization. The ' kommun'/' stad' variations are removed
+# before the 'kommun '/'stad ' ones, as separate passes, and diacritics are
+# folded with a single translate
+MUNICIPALITY_SUFFIX_PATTERN = re.compile(r' (?:kommun|stad)')
+MUNICIPALITY_PREFIX_PATTERN = re.compile(r'(?:kommun|stad) ')
+DIACRITIC_TABLE = str.maketrans({
+    'å': 'a', 'ä': 'a', 'ö': 'o',
+    'é': 'e', 'è': 'e', 'ü': 'u'
+})
+
+# Fields of a kept item that duplicate comparison and the final summary read.
+# Only these are retained per municipality, not the whole item with its payload
+RETAINED_FIELDS = (
+    'municipality', 'completeness_score', 'data_quality', 'confidence',
+    'status', 'phase1_fields_found', 'source_url', 'source_type', 'extraction_method'
+)
+
+def _retained_fields(item) -> Dict:
+    """Project an item onto the fields kept for later comparisons"""
+    return {field: item[field] for field in RETAINED_FIELDS if field in item}
+
+# Merged item status by how many of the three Phase 1 data points it has
+STATUS_BY_COUNT = ('empty', 'partial', 'partial', 'complete')
+
+# Final quality record per municipality, as returned by get_municipality_summary
+MunicipalitySummary = namedtuple(
+    'MunicipalitySummary',
+    'completeness_score data_quality confidence status source_type fields_found'
+)
+
+# Terms marking an official municipal domain in a source URL
+MUNICIPAL_DOMAIN_PATTERN = re.compile(r'kommun|stad')
+
+# Crawls revisit the same few hundred municipalities, so each distinct raw
+# name is normalized once
+@lru_cache(maxsize=4096)
+def _normalize_municipality_name(municipality: str) -> str:
+    """Normalize municipality name for consistent comparison"""
+    if not municipality:
+        return ""
+    
+    # Convert to lowercase and strip whitespace
+    normalized = municipality.lower().strip()
+    
+    # Remove common variations
+    normalized = MUNICIPALITY_SUFFIX_PATTERN.sub('', normalized)
+    normalized = MUNICIPALITY_PREFIX_PATTERN.sub('', normalized)
+    
+    # Handle special characters; most names are plain ASCII and need no folding
+    if not normalized.isascii():
+        normalized = normalized.translate(DIACRITIC_TABLE)
+    
+    # Remove extra spaces. For names this short split/join is several times
+    # faster than a regex sub, and it collapses the same whitespace
+    normalized = ' '.join(normalized.split())
+    
+    return normalized
+
+def _is_complete(item: Dict) -> bool:
+    """Whether an item has all three Phase 1 data points"""
+    return item.get('status') == 'complete' and item.get('phase1_fields_found', 0) == 3
+
+# URLs and extraction methods repeat heavily within a site, so each distinct
+# source is assessed once
+@lru_cache(maxsize=4096)
+def _source_quality(source_url: str, source_type: str, extraction_method: str) -> float:
+    """Assess source quality (0-1 scale)"""
+    quality = 0.0
+    
+    # Source type quality
+    if source_type == 'PDF':
+        quality += 0.4  # PDFs often more reliable
+    elif source_type == 'HTML':
+        quality += 0.3
+    
+    # URL quality
+    if '.se' in source_url:
+        quality += 0.2  # Swedish domain
+    if MUNICIPAL_DOMAIN_PATTERN.search(source_url.lower()):
+        quality += 0.2  # Official municipal domain
+    
+    # Extraction method quality
+    extraction_method = extraction_method.lower()
+    if 'pdf' in extraction_method:
+        quality += 0.1
+    if 'enhanced' in extraction_method:
+        quality += 0.1
+    
+    return min(quality, 1.0)
+
 class Phase1DuplicatesPipeline:
     """Detect and handle duplicates for Phase 1 data - one entry per municipality"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # Normalized municipality -> RETAINED_FIELDS of the item kept for it
         self.seen_municipalities = {}
+        # Quality score of the kept item per municipality, so it is only
+        # computed once however many duplicates it is compared against
+        self._scores = {}
         self.duplicates_removed = 0
         self.replacements_made = 0
         self.total_processed = 0
@@ -31,40 +129,24 @@ class Phase1DuplicatesPipeline:
             'confidence': 0.2,            # 20% weight for extraction confidence
             'source_quality': 0.1         # 10% weight for source quality
         }
+        
+        # Weights never change after start-up, so bake them into the scorer
+        self._calculate_overall_quality_score = self._build_quality_scorer(self.quality_weights)
     
     def process_item(self, item, spider):
         """Process item and handle duplicates"""
         try:
             self.total_processed += 1
-            municipality = item.get('municipality', '').strip()
+            municipality = item.get('municipality', '')
+            municipality = municipality.strip() if isinstance(municipality, str) else ''
             
             if not municipality:
                 spider.logger.warning("Item without municipality name - rejecting")
                 raise DropItem("Missing municipality name")
             
             # Normalize municipality name for comparison
-            normalized_municipality = self._normalize_municipality_name(municipality)
-            
-            if normalized_municipality in self.seen_municipalities:
-                existing_item = self.seen_municipalities[normalized_municipality]
-                
-                # Compare quality and decide which to keep
-                if self._should_replace_existing(existing_item, item, spider):
-                    self.seen_municipalities[normalized_municipality] = item
-                    self.replacements_made += 1
-                    spider.logger.info(f"Replaced {municipality} data with higher quality version "
-                                     f"(quality: {existing_item.get('data_quality', 0):.1f} -> "
-                                     f"{item.get('data_quality', 0):.1f})")
-                    return item
-                else:
-                    self.duplicates_removed += 1
-                    spider.logger.debug(f"Duplicate municipality {municipality} - keeping existing higher quality data")
-                    raise DropItem(f"Duplicate municipality: {municipality} (lower quality)")
-            else:
-                # First time seeing this municipality
-                self.seen_municipalities[normalized_municipality] = item
-                spider.logger.debug(f"First entry for municipality: {municipality}")
-                return item
+            normalized_municipality = _normalize_municipality_name(municipality)
+            return self._resolve_duplicate(item, municipality, normalized_municipality, spider)
                 
         except DropItem:
             raise
@@ -73,115 +155,138 @@ class Phase1DuplicatesPipeline:
             # Don't drop the item for processing errors, just log and continue
             return item
     
-    def _normalize_municipality_name(self, municipality: str) -> str:
-        """Normalize municipality name for consistent comparison"""
-        if not municipality:
-            return ""
-        
-        # Convert to lowercase and strip whitespace
-        normalized = municipality.lower().strip()
+    def process_items_batch(self, items, spider):
+        """Deduplicate already collected items together, returning the kept ones
         
-        # Remove common variations
-        normalized = normalized.replace(' kommun', '')
-        normalized = normalized.replace(' stad', '')
-        normalized = normalized.replace('kommun ', '')
-        normalized = normalized.replace('stad ', '')
-        
-        # Handle special characters
-        char_replacements = {
-            'å': 'a', 'ä': 'a', 'ö': 'o',
-            'é': 'e', 'è': 'e', 'ü': 'u'
-        }
-        
-        for old_char, new_char in char_replacements.items():
-            normalized = normalized.replace(old_char, new_char)
-        
-        # Remove extra spaces
-        normalized = ' '.join(normalized.split())
+        Items are grouped by normalized municipality name first, and each group
+        is resolved in order with the same quality comparison and statistics as
+        process_item. Only the item finally kept for each municipality is
+        returned, in the order municipalities were first seen; items without a
+        municipality name are left out.
+        """
+        groups = {}
+        for item in items:
+            self.total_processed += 1
+            municipality = item.get('municipality', '')
+            municipality = municipality.strip() if isinstance(municipality, str) else ''
+            if not municipality:
+                spider.logger.warning("Item without municipality name - rejecting")
+                continue
+            groups.setdefault(_normalize_municipality_name(municipality), []).append((municipality, item))
         
-        return normalized
+        kept_items = []
+        for normalized_municipality, group in groups.items():
+            kept = None
+            for municipality, item in group:
+                try:
+                    kept = self._resolve_duplicate(item, municipality, normalized_municipality, spider)
+                except DropItem:
+                    continue
+                except Exception as e:
+                    self.logger.error(f"Error processing duplicate detection: {e}")
+                    kept = item
+            if kept is not None:
+                kept_items.append(kept)
+        return kept_items
+    
+    def _resolve_duplicate(self, item, municipality: str, normalized_municipality: str, spider):
+        """Keep or replace the stored entry for a municipality, raising DropItem for a worse duplicate"""
+        existing_item = self.seen_municipalities.get(normalized_municipality)
+        if existing_item is not None:
+            # Compare quality and decide which to keep
+            if self._should_replace_existing(existing_item, item, spider, normalized_municipality):
+                self.seen_municipalities[normalized_municipality] = _retained_fields(item)
+                self.replacements_made += 1
+                spider.logger.info(f"Replaced {municipality} data with higher quality version "
+                                 f"(quality: {existing_item.get('data_quality', 0):.1f} -> "
+                                 f"{item.get('data_quality', 0):.1f})")
+                return item
+            else:
+                self.duplicates_removed += 1
+                spider.logger.debug("Duplicate municipality %s - keeping existing higher quality data", municipality)
+                raise DropItem(f"Duplicate municipality: {municipality} (lower quality)")
+        else:
+            # First time seeing this municipality
+            self.seen_municipalities[normalized_municipality] = _retained_fields(item)
+            spider.logger.debug("First entry for municipality: %s", municipality)
+            return item
     
-    def _should_replace_existing(self, existing: Dict, new: Dict, spider) -> bool:
-        """Determine if new item should replace existing based on quality metrics"""
+    def _should_replace_existing(self, existing: Dict, new: Dict, spider, key: Optional[str] = None) -> bool:
+        """Determine if new item should replace existing based on quality metrics
+        
+        When the normalized municipality key is given, the score of whichever
+        item is kept is cached under it for the next comparison.
+        """
         try:
-            existing_score = self._calculate_overall_quality_score(existing)
+            # Obvious outcomes skip the weighted scores: complete data is never
+            # replaced by incomplete data, and always replaces partial data
+            if _is_complete(existing) and new.get('phase1_fields_found', 0) < 3:
+                return False
+            if _is_complete(new) and existing.get('status') == 'partial':
+                self._scores.pop(key, None)
+                return True
+            
+            existing_score = self._scores.get(key)
+            if existing_score is None:
+                existing_score = self._calculate_overall_quality_score(existing)
             new_score = self._calculate_overall_quality_score(new)
             
-            spider.logger.debug(f"Quality comparison for {new.get('municipality')}: "
-                              f"existing={existing_score:.2f}, new={new_score:.2f}")
+            # Debug messages are formatted lazily, only when debug logging is enabled
+            spider.logger.debug("Quality comparison for %s: existing=%.2f, new=%.2f",
+                                new.get('municipality'), existing_score, new_score)
             
             # Replace if new item has significantly better quality (5% threshold)
-            return new_score > existing_score + 0.05
+            replace = new_score > existing_score + 0.05
+            if key is not None:
+                self._scores[key] = new_score if replace else existing_score
+            return replace
             
         except Exception as e:
             self.logger.error(f"Error comparing item quality: {e}")
             # If we can't compare, keep existing
             return False
     
-    def _calculate_overall_quality_score(self, item: Dict) -> float:
-        """Calculate overall quality score for comparison"""
-        score = 0.0
-        
-        # Completeness score (0-1)
-        completeness = item.get('completeness_score', 0)
-        score += completeness * self.quality_weights['completeness_score']
+    def _build_quality_scorer(self, quality_weights):
+        """Build the overall quality scorer with weights and the source assessor bound as locals"""
+        completeness_weight = quality_weights['completeness_score']
+        quality_weight = quality_weights['data_quality']
+        confidence_weight = quality_weights['confidence']
+        source_weight = quality_weights['source_quality']
+        assess_source_quality = self._assess_source_quality
         
-        # Data quality (0-100, normalize to 0-1)
-        data_quality = item.get('data_quality', 0) / 100.0
-        score += data_quality * self.quality_weights['data_quality']
+        def calculate_overall_quality_score(item: Dict) -> float:
+            """Calculate overall quality score for comparison"""
+            # Completeness (0-1), data quality (0-100, normalized to 0-1),
+            # extraction confidence (0-1) and source quality (0-1)
+            return (item.get('completeness_score', 0) * completeness_weight
+                    + item.get('data_quality', 0) / 100.0 * quality_weight
+                    + item.get('confidence', 0) * confidence_weight
+                    + assess_source_quality(item) * source_weight)
         
-        # Extraction confidence (0-1)
-        confidence = item.get('confidence', 0)
-        score += confidence * self.quality_weights['confidence']
-        
-        # Source quality (0-1)
-        source_quality = self._assess_source_quality(item)
-        score += source_quality * self.quality_weights['source_quality']
-        
-        return score
+        return calculate_overall_quality_score
     
     def _assess_source_quality(self, item: Dict) -> float:
         """Assess source quality (0-1 scale)"""
-        source_url = item.get('source_url', '')
-        source_type = item.get('source_type', '')
-        extraction_method = item.get('extraction_method', '')
-        
-        quality = 0.0
-        
-        # Source type quality
-        if source_type == 'PDF':
-            quality += 0.4  # PDFs often more reliable
-        elif source_type == 'HTML':
-            quality += 0.3
-        
-        # URL quality
-        if '.se' in source_url:
-            quality += 0.2  # Swedish domain
-        if any(term in source_url.lower() for term in ['kommun', 'stad']):
-            quality += 0.2  # Official municipal domain
-        
-        # Extraction method quality
-        if 'pdf' in extraction_method.lower():
-            quality += 0.1
-        if 'enhanced' in extraction_method.lower():
-            quality += 0.1
-        
-        return min(quality, 1.0)
+        return _source_quality(
+            item.get('source_url', ''),
+            item.get('source_type', ''),
+            item.get('extraction_method', '')
+        )
     
     def _create_item_fingerprint(self, item: Dict) -> str:
         """Create a fingerprint for the item based on its content"""
         # Create fingerprint based on municipality and key data
-        fingerprint_data = {
-            'municipality': item.get('municipality', ''),
-            'timtaxa_livsmedel': item.get('timtaxa_livsmedel'),
-            'debitering_livsmedel': item.get('debitering_livsmedel'),
-            'timtaxa_bygglov': item.get('timtaxa_bygglov'),
-            'source_url': item.get('source_url', '')
-        }
+        fingerprint_data = (
+            item.get('municipality', ''),
+            item.get('timtaxa_livsmedel'),
+            item.get('debitering_livsmedel'),
+            item.get('timtaxa_bygglov'),
+            item.get('source_url', '')
+        )
         
-        # Convert to string and hash
-        fingerprint_str = str(sorted(fingerprint_data.items()))
-        return hashlib.md5(fingerprint_str.encode('utf-8')).hexdigest()
+        # Fingerprints are only compared for equality, so an 8-byte BLAKE2b
+        # digest is enough and hashes faster than MD5
+        return hashlib.blake2b(repr(fingerprint_data).encode('utf-8'), digest_size=8).hexdigest()
     
     def get_duplicate_statistics(self) -> Dict:
         """Get statistics about duplicate detection"""
@@ -193,19 +298,20 @@ class Phase1DuplicatesPipeline:
             'duplicate_rate': (self.duplicates_removed / self.total_processed * 100) if self.total_processed > 0 else 0
         }
     
-    def get_municipality_summary(self) -> Dict:
+    def get_municipality_summary(self) -> Dict[str, MunicipalitySummary]:
         """Get summary of municipalities and their data quality"""
         summary = {}
         
         for municipality, item in self.seen_municipalities.items():
-            summary[municipality] = {
-                'completeness_score': item.get('completeness_score', 0),
-                'data_quality': item.get('data_quality', 0),
-                'confidence': item.get('confidence', 0),
-                'status': item.get('status', 'unknown'),
-                'source_type': item.get('source_type', 'unknown'),
-                'fields_found': item.get('phase1_fields_found', 0)
-            }
+            get = item.get
+            summary[municipality] = MunicipalitySummary(
+                get('completeness_score', 0),
+                get('data_quality', 0),
+                get('confidence', 0),
+                get('status', 'unknown'),
+                get('source_type', 'unknown'),
+                get('phase1_fields_found', 0)
+            )
         
         return summary
     
@@ -227,8 +333,18 @@ class Phase1DuplicatesPipeline:
         # Log quality distribution of final dataset
         summary = self.get_municipality_summary()
         if summary:
-            complete_count = sum(1 for item in summary.values() if item['status'] == 'complete')
-            partial_count = sum(1 for item in summary.values() if item['status'] == 'partial')
+            # Status counts and quality totals in one pass over the summary
+            complete_count = partial_count = 0
+            total_completeness = total_quality = total_confidence = 0
+            for record in summary.values():
+                status = record.status
+                if status == 'complete':
+                    complete_count += 1
+                elif status == 'partial':
+                    partial_count += 1
+                total_completeness += record.completeness_score
+                total_quality += record.data_quality
+                total_confidence += record.confidence
             
             spider.logger.info(f"\nFinal Dataset Quality:")
             spider.logger.info(f"  Complete municipalities: {complete_count} "
@@ -237,9 +353,9 @@ class Phase1DuplicatesPipeline:
                              f"({partial_count/len(summary)*100:.1f}%)")
             
             # Average quality metrics
-            avg_completeness = sum(item['completeness_score'] for item in summary.values()) / len(summary)
-            avg_quality = sum(item['data_quality'] for item in summary.values()) / len(summary)
-            avg_confidence = sum(item['confidence'] for item in summary.values()) / len(summary)
+            avg_completeness = total_completeness / len(summary)
+            avg_quality = total_quality / len(summary)
+            avg_confidence = total_confidence / len(summary)
             
             spider.logger.info(f"  Average completeness: {avg_completeness:.2f}")
             spider.logger.info(f"  Average data quality: {avg_quality:.1f}%")
@@ -252,6 +368,8 @@ class Phase1ItemMerger:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # Merges in the same second share one formatted merge_date
+        self.timestamp = CoarseTimestamp()
     
     def merge_items(self, primary_item: Dict, secondary_item: Dict) -> Dict:
         """Merge two items for the same municipality, keeping best data from each"""
@@ -284,21 +402,16 @@ class Phase1ItemMerger:
         merged['phase1_fields_found'] = fields_present
         
         # Update status
-        if fields_present == 3:
-            merged['status'] = 'complete'
-        elif fields_present > 0:
-            merged['status'] = 'partial'
-        else:
-            merged['status'] = 'empty'
+        merged['status'] = STATUS_BY_COUNT[fields_present]
         
         # Add merge metadata
         merged['merged_from_sources'] = [
             primary_item.get('source_url', ''),
             secondary_item.get('source_url', '')
         ]
-        merged['merge_date'] = datetime.now().isoformat()
+        merged['merge_date'] = self.timestamp.now()
         
-        self.logger.debug(f"Merged items for {merged.get('municipality')}: "
-                         f"{fields_present}/3 fields after merge")
+        self.logger.debug("Merged items for %s: %d/3 fields after merge",
+                          merged.get('municipality'), fields_present)
         
         return merged 
\ No newline at end of file
@@ -9,21 +9,43 @@ Validates and enhances the three specific Phase 1 data points:
 
 import logging
 import re
-from datetime import datetime
+from bisect import bisect_right
 try:
     from scrapy.exceptions import DropItem
 except Exception:  # pragma: no cover - fallback if Scrapy is missing
     class DropItem(Exception):
         pass
 from typing import Dict, List, Optional
+from ..utils.timestamps import CoarseTimestamp
 from ..utils.validators import SwedishValidators
 
+# The two billing models a debitering value is normalized to
+DEBITERING_VALUES = frozenset({'förskott', 'efterhand'})
+
+# Terms marking an official municipal domain in a source URL
+MUNICIPAL_DOMAIN_PATTERN = re.compile(r'kommun|stad')
+
+# Data quality tiers, indexed by how many of the lower bounds a score reaches
+QUALITY_TIER_BOUNDS = (50, 70, 90)
+QUALITY_TIERS = ('poor', 'fair', 'good', 'excellent')
+
+# Billing model wordings, matched anywhere in the lowercased value. Longer
+# wordings such as 'förskottsfaktura' or 'i efterhand' are covered by their
+# stems, and förskott wins when a value matches both
+FORSKOTT_PATTERN = re.compile(r'förskott|förväg|advance|prepaid')
+EFTERHAND_PATTERN = re.compile(r'efterhand|efterskott|faktura|betalas efter|debiteras efter|faktureras efter')
+
+# Obvious test or placeholder data in a municipality name
+INVALID_MUNICIPALITY_PATTERN = re.compile(r'test|example|sample|xxx|123', re.IGNORECASE)
+
 class Phase1EnhancedValidationPipeline:
     """Enhanced validation pipeline specifically for Phase 1 data"""
+    __slots__ = ('logger', 'validators', 'timestamp', 'stats', 'validation_rules', '_timtaxa_bounds')
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.validators = SwedishValidators()
+        self.timestamp = CoarseTimestamp()
         
         # Phase 1 specific statistics
         self.stats = {
@@ -45,8 +67,8 @@ class Phase1EnhancedValidationPipeline:
                 'poor': 0          # <50%
             },
             'timtaxa_ranges': {
-                'livsmedel': {'min': float('inf'), 'max': 0, 'values': []},
-                'bygglov': {'min': float('inf'), 'max': 0, 'values': []}
+                'livsmedel': {'min': float('inf'), 'max': 0, 'sum': 0, 'count': 0},
+                'bygglov': {'min': float('inf'), 'max': 0, 'sum': 0, 'count': 0}
             },
             'debitering_distribution': {
                 'förskott': 0,
@@ -70,49 +92,90 @@ class Phase1EnhancedValidationPipeline:
                 'description': 'Hourly rate for building permits'
             },
             'debitering_livsmedel': {
-                'allowed_values': ['förskott', 'efterhand'],
+                'allowed_values': DEBITERING_VALUES,
                 'description': 'Billing model for food control'
             }
         }
+        
+        # (min, max, typical low, typical high) per timtaxa field, unpacked
+        # once per value instead of looked up key by key
+        self._timtaxa_bounds = {
+            field: (rules['min_value'], rules['max_value']) + rules['typical_range']
+            for field, rules in self.validation_rules.items()
+            if 'typical_range' in rules
+        }
     
     def process_item(self, item, spider):
         """Validate and enhance Phase 1 item"""
+        return self._validate_item(item, spider, self.timestamp.now())
+    
+    def process_items_batch(self, items, spider):
+        """Validate already collected items together, returning the valid ones
+        
+        Every item goes through the same checks and statistics as in
+        process_item, and the whole batch shares one validation_date. Invalid
+        items are counted and logged like in process_item but left out of the
+        result instead of raising DropItem.
+        """
+        validation_date = self.timestamp.now()
+        valid_items = []
+        for item in items:
+            try:
+                valid_items.append(self._validate_item(item, spider, validation_date))
+            except DropItem:
+                continue
+        return valid_items
+    
+    def _validate_item(self, item, spider, validation_date: str):
+        """Validate and enhance one item stamped with validation_date, raising DropItem if unusable"""
         try:
             self.stats['total_items'] += 1
             
             # Validate municipality (required)
-            if not self._validate_municipality(item, spider):
+            original_municipality = item.get('municipality', '')
+            if not self._validate_municipality(original_municipality, spider):
                 self.stats['rejected_items'] += 1
                 raise DropItem("Missing or invalid municipality")
             
+            # Items without any Phase 1 value are dropped before the name is
+            # cleaned or any field is validated
+            timtaxa_livsmedel = item.get('timtaxa_livsmedel')
+            debitering_livsmedel = item.get('debitering_livsmedel')
+            timtaxa_bygglov = item.get('timtaxa_bygglov')
+            if not (timtaxa_livsmedel or debitering_livsmedel or timtaxa_bygglov):
+                self.stats['rejected_items'] += 1
+                raise DropItem("No valid Phase 1 data found")
+            
             # Clean and enhance municipality name
-            original_municipality = item.get('municipality', '')
             item['municipality'] = self.validators.clean_municipality_name(original_municipality)
             if item['municipality'] != original_municipality:
                 self.stats['enhanced_items'] += 1
-                spider.logger.debug(f"Enhanced municipality name: {original_municipality} -> {item['municipality']}")
+                spider.logger.debug("Enhanced municipality name: %s -> %s", original_municipality, item['municipality'])
             
             # Validate and enhance Phase 1 fields
             fields_present = 0
             validation_warnings = []
             
             # 1. Validate timtaxa_livsmedel
-            if self._validate_and_enhance_timtaxa(item, 'timtaxa_livsmedel', spider):
+            timtaxa_livsmedel = self._validate_and_enhance_timtaxa(item, 'timtaxa_livsmedel', timtaxa_livsmedel, spider)
+            if timtaxa_livsmedel is not None:
                 fields_present += 1
                 self.stats['field_coverage']['timtaxa_livsmedel'] += 1
-                self._update_timtaxa_stats('livsmedel', item['timtaxa_livsmedel'])
+                self._update_timtaxa_stats('livsmedel', timtaxa_livsmedel)
             
             # 2. Validate debitering_livsmedel
-            if self._validate_and_enhance_debitering(item, spider):
+            debitering_livsmedel = self._validate_and_enhance_debitering(item, debitering_livsmedel, spider)
+            if debitering_livsmedel is not None:
                 fields_present += 1
                 self.stats['field_coverage']['debitering_livsmedel'] += 1
-                self._update_debitering_stats(item['debitering_livsmedel'])
+                self._update_debitering_stats(debitering_livsmedel)
             
             # 3. Validate timtaxa_bygglov
-            if self._validate_and_enhance_timtaxa(item, 'timtaxa_bygglov', spider):
+            timtaxa_bygglov = self._validate_and_enhance_timtaxa(item, 'timtaxa_bygglov', timtaxa_bygglov, spider)
+            if timtaxa_bygglov is not None:
                 fields_present += 1
                 self.stats['field_coverage']['timtaxa_bygglov'] += 1
-                self._update_timtaxa_stats('bygglov', item['timtaxa_bygglov'])
+                self._update_timtaxa_stats('bygglov', timtaxa_bygglov)
             
             # Check if we have any valid Phase 1 data
             if fields_present == 0:
@@ -123,7 +186,7 @@ class Phase1EnhancedValidationPipeline:
             item['completeness_score'] = fields_present / 3.0
             item['data_quality'] = self._assess_data_quality(item)
             item['validation_warnings'] = validation_warnings
-            item['validation_date'] = datetime.now().isoformat()
+            item['validation_date'] = validation_date
             item['validation_version'] = 'phase1_enhanced_v1.0'
             
             # Categorize item
@@ -141,8 +204,8 @@ class Phase1EnhancedValidationPipeline:
             item['phase1_fields_found'] = fields_present
             item['phase1_success_rate'] = fields_present / 3.0
             
-            spider.logger.info(f"Validated {item['municipality']}: {fields_present}/3 fields, "
-                             f"quality: {item['data_quality']:.1f}%")
+            spider.logger.info("Validated %s: %d/3 fields, quality: %.1f%%",
+                               item['municipality'], fields_present, item['data_quality'])
             
             return item
             
@@ -153,9 +216,9 @@ class Phase1EnhancedValidationPipeline:
             self.stats['rejected_items'] += 1
             raise DropItem(f"Validation error: {str(e)}")
     
-    def _validate_municipality(self, item: Dict, spider) -> bool:
-        """Validate municipality field"""
-        municipality = item.get('municipality', '').strip()
+    def _validate_municipality(self, municipality: str, spider) -> bool:
+        """Validate the item's municipality name"""
+        municipality = municipality.strip()
         
         if not municipality:
             spider.logger.warning("Missing municipality name")
@@ -166,55 +229,54 @@ class Phase1EnhancedValidationPipeline:
             spider.logger.warning(f"Municipality name too short: {municipality}")
             return False
         
-        # Check for obvious test/invalid data
-        invalid_patterns = ['test', 'example', 'sample', 'xxx', '123']
-        if any(pattern in municipality.lower() for pattern in invalid_patterns):
+        # Check for obvious test/invalid data, case-insensitively without a
+        # lowercased copy of the name
+        if INVALID_MUNICIPALITY_PATTERN.search(municipality):
             spider.logger.warning(f"Invalid municipality name: {municipality}")
             return False
         
         return True
     
-    def _validate_and_enhance_timtaxa(self, item: Dict, field: str, spider) -> bool:
-        """Validate and enhance timtaxa fields"""
-        value = item.get(field)
+    def _validate_and_enhance_timtaxa(self, item: Dict, field: str, value, spider) -> Optional[int]:
+        """Validate and enhance a timtaxa field, returning the accepted rate or None"""
         if not value:
-            return False
+            return None
         
         try:
             # Convert to float and validate
             amount = float(value)
-            rules = self.validation_rules[field]
+            min_value, max_value, typical_low, typical_high = self._timtaxa_bounds[field]
             
             # Check range
-            if amount < rules['min_value'] or amount > rules['max_value']:
+            if amount < min_value or amount > max_value:
                 spider.logger.warning(f"Invalid {field} for {item['municipality']}: {amount} "
-                                    f"(valid range: {rules['min_value']}-{rules['max_value']})")
+                                    f"(valid range: {min_value}-{max_value})")
                 item[field] = None
-                return False
+                return None
             
             # Convert to integer (Swedish rates are typically whole numbers)
-            item[field] = int(amount)
+            rate = int(amount)
+            item[field] = rate
             
             # Add quality indicators
-            if rules['typical_range'][0] <= amount <= rules['typical_range'][1]:
+            if typical_low <= amount <= typical_high:
                 item[f'{field}_quality'] = 'typical'
-            elif amount < rules['typical_range'][0]:
+            elif amount < typical_low:
                 item[f'{field}_quality'] = 'low'
             else:
                 item[f'{field}_quality'] = 'high'
             
-            return True
+            return rate
             
         except (ValueError, TypeError) as e:
             spider.logger.warning(f"Invalid {field} value for {item['municipality']}: {value} - {e}")
             item[field] = None
-            return False
+            return None
     
-    def _validate_and_enhance_debitering(self, item: Dict, spider) -> bool:
-        """Validate and enhance debitering model"""
-        value = item.get('debitering_livsmedel')
+    def _validate_and_enhance_debitering(self, item: Dict, value, spider) -> Optional[str]:
+        """Validate and enhance debitering model, returning the normalized model or None"""
         if not value:
-            return False
+            return None
         
         # Normalize the value
         normalized = self._normalize_debitering_value(value)
@@ -222,81 +284,56 @@ class Phase1EnhancedValidationPipeline:
         if normalized:
             item['debitering_livsmedel'] = normalized
             item['debitering_livsmedel_original'] = value  # Keep original for reference
-            return True
+            return normalized
         else:
             spider.logger.warning(f"Invalid debitering model for {item['municipality']}: {value}")
             item['debitering_livsmedel'] = None
-            return False
+            return None
     
     def _normalize_debitering_value(self, value: str) -> Optional[str]:
         """Normalize debitering model to standard values"""
         if not value:
             return None
         
-        value_lower = str(value).lower().strip()
-        
-        # Patterns for förskott (prepaid)
-        forskott_patterns = [
-            'förskott', 'förväg', 'advance', 'prepaid', 'i förskott',
-            'förskottsbetalning', 'förskottsfaktura', 'betalas i förväg'
-        ]
-        
-        # Patterns for efterhand (post-paid)
-        efterhand_patterns = [
-            'efterhand', 'efterskott', 'faktura', 'i efterhand',
-            'efterhandsdebitering', 'efterhandsfaktura', 'betalas efter',
-            'debiteras efter', 'faktureras efter'
-        ]
+        value_lower = str(value).lower()
         
-        # Check for förskott patterns
-        for pattern in forskott_patterns:
-            if pattern in value_lower:
-                return 'förskott'
+        if FORSKOTT_PATTERN.search(value_lower):
+            return 'förskott'
         
-        # Check for efterhand patterns
-        for pattern in efterhand_patterns:
-            if pattern in value_lower:
-                return 'efterhand'
+        if EFTERHAND_PATTERN.search(value_lower):
+            return 'efterhand'
         
         return None
     
     def _assess_data_quality(self, item: Dict) -> float:
         """Assess overall data quality for Phase 1 item"""
-        score = 0
+        get = item.get
         
-        # Base confidence from extraction
-        confidence = item.get('confidence', 0)
-        score += confidence * 40
-        
-        # Completeness score (30 points)
-        completeness = item.get('completeness_score', 0)
-        score += completeness * 30
+        # Base confidence from extraction (40 points) and completeness (30 points)
+        score = get('confidence', 0) * 40 + get('completeness_score', 0) * 30
         
         # Source quality (15 points)
-        source_url = item.get('source_url', '')
+        source_url = get('source_url', '')
         if source_url.endswith('.pdf'):
             score += 10  # PDFs often more reliable
-        if '.se' in source_url and any(term in source_url for term in ['kommun', 'stad']):
+        if '.se' in source_url and MUNICIPAL_DOMAIN_PATTERN.search(source_url):
             score += 5   # Official municipal domain
         
         # Value reasonableness (10 points)
-        timtaxa_livsmedel = item.get('timtaxa_livsmedel')
-        if timtaxa_livsmedel and item.get('timtaxa_livsmedel_quality') == 'typical':
+        if get('timtaxa_livsmedel') and get('timtaxa_livsmedel_quality') == 'typical':
             score += 3
-        
-        timtaxa_bygglov = item.get('timtaxa_bygglov')
-        if timtaxa_bygglov and item.get('timtaxa_bygglov_quality') == 'typical':
+        if get('timtaxa_bygglov') and get('timtaxa_bygglov_quality') == 'typical':
             score += 3
         
         # Valid debitering model (4 points)
-        if item.get('debitering_livsmedel') in ['förskott', 'efterhand']:
+        if get('debitering_livsmedel') in DEBITERING_VALUES:
             score += 4
         
         # Extraction method quality (5 points)
-        extraction_method = item.get('extraction_method', '')
-        if 'pdf' in extraction_method.lower():
+        extraction_method = get('extraction_method', '').lower()
+        if 'pdf' in extraction_method:
             score += 3
-        elif 'enhanced' in extraction_method.lower():
+        elif 'enhanced' in extraction_method:
             score += 2
         
         return min(score, 100)
@@ -304,27 +341,23 @@ class Phase1EnhancedValidationPipeline:
     def _update_timtaxa_stats(self, category: str, value: int):
         """Update timtaxa statistics"""
         stats = self.stats['timtaxa_ranges'][category]
-        stats['values'].append(value)
-        stats['min'] = min(stats['min'], value)
-        stats['max'] = max(stats['max'], value)
+        stats['sum'] += value
+        stats['count'] += 1
+        if value < stats['min']:
+            stats['min'] = value
+        if value > stats['max']:
+            stats['max'] = value
     
     def _update_debitering_stats(self, value: str):
         """Update debitering statistics"""
-        if value in ['förskott', 'efterhand']:
+        if value in DEBITERING_VALUES:
             self.stats['debitering_distribution'][value] += 1
         else:
             self.stats['debitering_distribution']['unknown'] += 1
     
     def _update_quality_distribution(self, quality: float):
         """Update quality distribution statistics"""
-        if quality >= 90:
-            self.stats['data_quality_distribution']['excellent'] += 1
-        elif quality >= 70:
-            self.stats['data_quality_distribution']['good'] += 1
-        elif quality >= 50:
-            self.stats['data_quality_distribution']['fair'] += 1
-        else:
-            self.stats['data_quality_distribution']['poor'] += 1
+        self.stats['data_quality_distribution'][QUALITY_TIERS[bisect_right(QUALITY_TIER_BOUNDS, quality)]] += 1
     
     def close_spider(self, spider):
         """Log comprehensive Phase 1 validation statistics"""
@@ -361,9 +394,9 @@ class Phase1EnhancedValidationPipeline:
         # Timtaxa statistics
         spider.logger.info(f"\nTimtaxa Statistics:")
         for category, stats in self.stats['timtaxa_ranges'].items():
-            if stats['values']:
-                avg = sum(stats['values']) / len(stats['values'])
-                spider.logger.info(f"  {category}: {len(stats['values'])} values, "
+            if stats['count']:
+                avg = stats['sum'] / stats['count']
+                spider.logger.info(f"  {category}: {stats['count']} values, "
                                   f"range: {stats['min']}-{stats['max']} kr, "
                                   f"average: {avg:.0f} kr")
         
@@ -8,7 +8,8 @@ Validates the three specific Phase 1 data points:
 """
 
 import logging
-from datetime import datetime
+import re
+from collections import Counter
 try:
     from scrapy.exceptions import DropItem
 except Exception:  # pragma: no cover - fallback if Scrapy is missing
@@ -16,11 +17,18 @@ except Exception:  # pragma: no cover - fallback if Scrapy is missing
         pass
 from typing import Dict, List, Optional
 
+from ..utils.timestamps import CoarseTimestamp
+
+# Swedish municipality indicators in a source URL: a Swedish domain, or
+# 'kommun' (municipality) or 'stad' (city) anywhere in it
+MUNICIPAL_URL_PATTERN = re.compile(r'\.se/|kommun|stad', re.IGNORECASE)
+
 class Phase1ValidationPipeline:
     """Phase 1 focused validation pipeline"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.timestamp = CoarseTimestamp()
         
         # Phase 1 validation rules
         self.validation_rules = {
@@ -55,7 +63,7 @@ class Phase1ValidationPipeline:
             'items_with_debitering_model': 0,
             'items_with_bygglov_timtaxa': 0,
             'complete_items': 0,  # Items with all 3 fields
-            'validation_warnings': []
+            'validation_warnings': Counter()  # Occurrences per warning message
         }
     
     def process_item(self, item, spider):
@@ -72,7 +80,7 @@ class Phase1ValidationPipeline:
         
         # Add validation metadata
         item['validation_warnings'] = validation_result['warnings']
-        item['validation_date'] = datetime.now().isoformat()
+        item['validation_date'] = self.timestamp.now()
         item['validation_version'] = 'phase1_v1.0'
         
         # Update statistics
@@ -92,15 +100,14 @@ class Phase1ValidationPipeline:
             errors.append("Municipality is required")
             is_valid = False
         
-        # Validate each Phase 1 field
+        # Validate each Phase 1 field, reading each value once
         phase1_fields_found = 0
+        rules = self.validation_rules
         
         # 1. Validate timtaxa_livsmedel
-        if 'timtaxa_livsmedel' in item and item['timtaxa_livsmedel']:
-            validation = self._validate_field(
-                item['timtaxa_livsmedel'], 
-                self.validation_rules['timtaxa_livsmedel']
-            )
+        value = item.get('timtaxa_livsmedel')
+        if value:
+            validation = self._validate_field(value, rules['timtaxa_livsmedel'])
             if validation['is_valid']:
                 phase1_fields_found += 1
                 self.stats['items_with_livsmedel_timtaxa'] += 1
@@ -109,11 +116,9 @@ class Phase1ValidationPipeline:
                 is_valid = False
         
         # 2. Validate debitering_livsmedel
-        if 'debitering_livsmedel' in item and item['debitering_livsmedel']:
-            validation = self._validate_field(
-                item['debitering_livsmedel'], 
-                self.validation_rules['debitering_livsmedel']
-            )
+        value = item.get('debitering_livsmedel')
+        if value:
+            validation = self._validate_field(value, rules['debitering_livsmedel'])
             if validation['is_valid']:
                 phase1_fields_found += 1
                 self.stats['items_with_debitering_model'] += 1
@@ -122,11 +127,9 @@ class Phase1ValidationPipeline:
                 is_valid = False
         
         # 3. Validate timtaxa_bygglov
-        if 'timtaxa_bygglov' in item and item['timtaxa_bygglov']:
-            validation = self._validate_field(
-                item['timtaxa_bygglov'], 
-                self.validation_rules['timtaxa_bygglov']
-            )
+        value = item.get('timtaxa_bygglov')
+        if value:
+            validation = self._validate_field(value, rules['timtaxa_bygglov'])
             if validation['is_valid']:
                 phase1_fields_found += 1
                 self.stats['items_with_bygglov_timtaxa'] += 1
@@ -212,23 +215,14 @@ class Phase1ValidationPipeline:
         if not url:
             return False
         
-        url_lower = url.lower()
-        
-        # Swedish municipality indicators
-        municipal_indicators = [
-            '.se/',  # Swedish domain
-            'kommun',  # Municipality
-            'stad',    # City
-        ]
-        
         # Should have at least one municipal indicator
-        return any(indicator in url_lower for indicator in municipal_indicators)
+        return MUNICIPAL_URL_PATTERN.search(url) is not None
     
     def _update_statistics(self, item: Dict):
         """Update validation statistics"""
         # Track warnings
         warnings = item.get('validation_warnings', [])
-        self.stats['validation_warnings'].extend(warnings)
+        self.stats['validation_warnings'].update(warnings)
     
     def close_spider(self, spider):
         """Log Phase 1 validation statistics"""
@@ -257,10 +251,8 @@ class Phase1ValidationPipeline:
         
         # Most common warnings
         if self.stats['validation_warnings']:
-            from collections import Counter
-            warning_counts = Counter(self.stats['validation_warnings'])
             spider.logger.info("Most common validation warnings:")
-            for warning, count in warning_counts.most_common(5):
+            for warning, count in self.stats['validation_warnings'].most_common(5):
                 spider.logger.info(f"  {warning}: {count} times")
 
 def validate_phase1_data(item: Dict) -> Dict:
@@ -42,6 +42,8 @@ ENHANCED_DUPLICATE_SETTINGS = {
     'detection_strategies': ['exact_match', 'fuzzy_match', 'semantic_match'],
     'quality_threshold': 0.15,
     'enable_merging': True,
+    # Directory for the fingerprint index kept between crawls (None = in-memory only)
+    'state_dir': None,
     'quality_weights': {
         'confidence': 0.3,
         'validation_score': 0.25,
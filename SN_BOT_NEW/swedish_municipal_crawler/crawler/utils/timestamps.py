@@ -0,0 +1,22 @@
+import time
+from datetime import datetime
+
+class CoarseTimestamp:
+    """ISO timestamp source that formats at most once per second
+    
+    Pipelines stamp every item they touch. Calling datetime.now().isoformat()
+    per item pays for a clock read plus string formatting each time, while
+    second resolution is all the exported data needs.
+    """
+    
+    def __init__(self):
+        self._second = None
+        self._value = None
+    
+    def now(self):
+        """Return the current local time as an ISO string, truncated to the second"""
+        second = int(time.time())
+        if second != self._second:
+            self._second = second
+            self._value = datetime.fromtimestamp(second).isoformat()
+        return self._value
@@ -17,8 +17,9 @@ from pathlib import Path
 # Add the project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from crawler.pipelines import enhanced_validation_pipeline
 from crawler.pipelines.enhanced_validation_pipeline import EnhancedValidationPipeline
-from crawler.pipelines.enhanced_duplicate_pipeline import EnhancedDuplicatesPipeline
+from crawler.pipelines.enhanced_duplicate_pipeline import EnhancedDuplicatesPipeline, _within_edit_distance
 from crawler.pipelines.enhanced_data_pipeline import EnhancedSwedishFeeDataPipeline
 
 # Setup logging
@@ -174,7 +175,10 @@ class EnhancedPipelineTester:
         
         results = {
             'validation': await self.test_validation_pipeline(),
+            'validation_batch': await self.test_validation_batch(),
             'duplicate_detection': await self.test_duplicate_pipeline(),
+            'duplicate_persistence': await self.test_duplicate_persistence(),
+            'edit_distance': await self.test_edit_distance(),
             'data_export': await self.test_data_pipeline(),
             'integration': await self.test_pipeline_integration()
         }
@@ -241,6 +245,68 @@ class EnhancedPipelineTester:
         
         return result
     
+    async def test_validation_batch(self):
+        """Test that process_items_batch validates like a process_item loop"""
+        logger.info("\n--- Testing Enhanced Validation Batch ---")
+        
+        result = {
+            'status': 'PASS',
+            'items_processed': 0,
+            'items_valid': 0,
+            'errors': []
+        }
+        
+        # Amounts in every tier, an unparseable amount and an unknown category
+        base_item = self.test_items[0]
+        batch_items = self.test_items + [
+            dict(base_item, amount=5),
+            dict(base_item, amount=30),
+            dict(base_item, amount=250000),
+            dict(base_item, amount='gratis'),
+            dict(base_item, category='parkering')
+        ]
+        
+        def without_dates(items):
+            return [dict(item, validation=dict(item['validation'], validation_date=None)) for item in items]
+        
+        numpy_module = enhanced_validation_pipeline.np
+        try:
+            # The numpy path and the per-item fallback must both match process_item
+            for label, batch_np in (('numpy', numpy_module), ('per-item', None)):
+                loop_pipeline = EnhancedValidationPipeline()
+                loop_valid = []
+                for item in batch_items:
+                    try:
+                        loop_valid.append(loop_pipeline.process_item(item.copy(), self.spider))
+                    except Exception as e:
+                        if "Validation" not in str(e):
+                            raise
+                
+                enhanced_validation_pipeline.np = batch_np
+                batch_pipeline = EnhancedValidationPipeline()
+                batch_valid = batch_pipeline.process_items_batch([item.copy() for item in batch_items])
+                enhanced_validation_pipeline.np = numpy_module
+                
+                result['items_processed'] += len(batch_items)
+                result['items_valid'] += len(batch_valid)
+                if without_dates(batch_valid) != without_dates(loop_valid):
+                    result['errors'].append(f"{label} batch kept different items than process_item")
+                if batch_pipeline.stats != loop_pipeline.stats:
+                    result['errors'].append(f"{label} batch statistics differ from process_item")
+            
+            logger.info(f"Validation batch results: {result['items_valid']} valid "
+                       f"of {result['items_processed']} over both batch paths")
+            
+        except Exception as e:
+            logger.error(f"Validation batch test failed: {e}")
+            result['errors'].append(str(e))
+        finally:
+            enhanced_validation_pipeline.np = numpy_module
+        
+        if result['errors']:
+            result['status'] = 'FAIL'
+        return result
+    
     async def test_duplicate_pipeline(self):
         """Test enhanced duplicate detection pipeline"""
         logger.info("\n--- Testing Enhanced Duplicate Detection Pipeline ---")
@@ -293,6 +359,154 @@ class EnhancedPipelineTester:
         
         return result
     
+    async def test_duplicate_persistence(self):
+        """Test that a state_dir carries fingerprints over to the next crawl"""
+        logger.info("\n--- Testing Persistent Duplicate Detection ---")
+        
+        result = {
+            'status': 'PASS',
+            'items_processed': 0,
+            'duplicates_removed': 0,
+            'errors': []
+        }
+        
+        state_dir = Path(self.temp_dir) / 'duplicate_state'
+        stockholm, goteborg, _, _, _, goteborg_better = self.test_items
+        
+        try:
+            # First crawl stores two fees and writes them to the state directory
+            first_run = EnhancedDuplicatesPipeline(state_dir=state_dir)
+            for item in (stockholm, goteborg):
+                first_run.process_item(item.copy(), self.spider)
+                result['items_processed'] += 1
+            result['errors'].extend(self._check_fingerprint_tables(first_run))
+            first_run.close_spider(self.spider)
+            
+            # Second crawl: a poor copy of a first-run fee is a duplicate, and
+            # a better version of the other one replaces the stored fee
+            second_run = EnhancedDuplicatesPipeline(state_dir=state_dir)
+            poor_copy = dict(stockholm, confidence=0.1, description='', source_url='',
+                             source_type='HTML', extraction_method='generic', category='')
+            try:
+                second_run.process_item(poor_copy, self.spider)
+            except Exception as e:
+                if "Duplicate fee" not in str(e):
+                    raise
+            result['items_processed'] += 1
+            if second_run.duplicates_removed != 1:
+                result['errors'].append("Duplicate from the first crawl was not found")
+            
+            replacement = second_run.process_item(goteborg_better.copy(), self.spider)
+            result['items_processed'] += 1
+            if second_run.quality_upgrades + second_run.duplicates_merged != 1:
+                result['errors'].append("Better version of a first-run fee was not matched")
+            result['errors'].extend(self._check_fingerprint_tables(second_run))
+            second_run.close_spider(self.spider)
+            result['duplicates_removed'] = second_run.duplicates_removed
+            
+            # Third crawl finds the replacement, not the fee it replaced
+            third_run = EnhancedDuplicatesPipeline(state_dir=state_dir)
+            parts = third_run._fingerprint_parts(goteborg)
+            canonical, entry = third_run._find_entry(third_run._fuzzy_fingerprint(parts))
+            if entry is None or entry.item.get('source_url') != replacement.get('source_url'):
+                result['errors'].append("Replaced fee was not persisted")
+            result['errors'].extend(self._check_stored_state(third_run))
+            third_run.close_spider(self.spider)
+            
+            logger.info(f"Persistent duplicate detection: {result['items_processed']} items over 3 crawls, "
+                       f"{result['duplicates_removed']} duplicate from an earlier crawl removed")
+            
+        except Exception as e:
+            logger.error(f"Persistent duplicate detection test failed: {e}")
+            result['errors'].append(str(e))
+        
+        if result['errors']:
+            result['status'] = 'FAIL'
+        return result
+    
+    def _check_fingerprint_tables(self, pipeline):
+        """Check that every known fingerprint resolves to a stored fee and is in the filter"""
+        errors = []
+        for canonical, entry in pipeline.items_by_fingerprint.items():
+            if entry.fingerprints['exact_match'] != canonical:
+                errors.append(f"Fee stored under a non-exact fingerprint: {entry.item.get('fee_name')}")
+            for fingerprint in entry.fingerprints.values():
+                if fingerprint not in pipeline.fingerprint_filter:
+                    errors.append(f"Fingerprint missing from the filter: {entry.item.get('fee_name')}")
+        for fingerprint, canonical in pipeline.fingerprint_aliases.items():
+            if canonical not in pipeline.items_by_fingerprint:
+                errors.append("Alias points to a fee that is no longer stored")
+            if fingerprint not in pipeline.fingerprint_filter:
+                errors.append("Alias fingerprint missing from the filter")
+        return errors
+    
+    def _check_stored_state(self, pipeline):
+        """Check that every persisted alias points to a persisted fee"""
+        store = pipeline.fingerprint_store
+        errors = []
+        for key in store.keys():
+            if key.startswith('alias:') and 'item:' + store[key] not in store:
+                errors.append("Persisted alias points to a removed fee")
+            if key.startswith('item:'):
+                fingerprint = key[len('item:'):]
+                if 'alias:' + fingerprint in store:
+                    errors.append("Replaced fee is still persisted")
+                if bytes.fromhex(fingerprint) not in pipeline.fingerprint_filter:
+                    errors.append("Persisted fee missing from the filter")
+        return errors
+    
+    async def test_edit_distance(self):
+        """Test the banded edit distance check used when merging fee texts"""
+        logger.info("\n--- Testing Edit Distance Limit ---")
+        
+        result = {
+            'status': 'PASS',
+            'items_processed': 0,
+            'errors': []
+        }
+        
+        # (a, b, limit, expected): empty strings, length differences over the
+        # limit, and distances exactly at and one over the limit
+        cases = [
+            ('', '', 0, True),
+            ('', 'ab', 2, True),
+            ('', 'abc', 2, False),
+            ('Bygglov för enbostadshus', 'Bygglov', 3, False),
+            ('kitten', 'sitting', 3, True),
+            ('kitten', 'sitting', 2, False),
+            ('abc', 'xyz', 3, True),
+            ('abc', 'xyz', 2, False),
+            ('ab', 'ba', 2, True),
+            ('ab', 'ba', 1, False),
+            ('Miljötillstånd restaurang', 'Miljötillstånd för restaurang', 4, True),
+            ('Miljötillstånd restaurang', 'Miljötillstånd för restaurang', 3, False)
+        ]
+        
+        for a, b, limit, expected in cases:
+            for first, second in ((a, b), (b, a)):
+                if _within_edit_distance(first, second, limit) != expected:
+                    result['errors'].append(f"{first!r} vs {second!r} within {limit}: expected {expected}")
+                if (self._edit_distance(first, second) <= limit) != expected:
+                    result['errors'].append(f"Bad test case: {first!r} vs {second!r} within {limit}")
+                result['items_processed'] += 1
+        
+        logger.info(f"Edit distance results: {result['items_processed']} comparisons, "
+                   f"{len(result['errors'])} wrong")
+        
+        if result['errors']:
+            result['status'] = 'FAIL'
+        return result
+    
+    def _edit_distance(self, a, b):
+        """Full Levenshtein distance, as a reference for the banded check"""
+        previous = list(range(len(b) + 1))
+        for i, char_a in enumerate(a, 1):
+            current = [i]
+            for j, char_b in enumerate(b, 1):
+                current.append(min(previous[j - 1] + (char_a != char_b), previous[j] + 1, current[j - 1] + 1))
+            previous = current
+        return previous[-1]
+    
     async def test_data_pipeline(self):
         """Test enhanced data export pipeline"""
         logger.info("\n--- Testing Enhanced Data Export Pipeline ---")
@@ -16,9 +16,10 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from crawler.pipelines.phase1_enhanced_validation_pipeline import Phase1EnhancedValidationPipeline
-from crawler.pipelines.phase1_duplicate_pipeline import Phase1DuplicatesPipeline
+from crawler.pipelines.phase1_duplicate_pipeline import Phase1DuplicatesPipeline, _normalize_municipality_name
 from crawler.pipelines.phase1_data_pipeline import Phase1DataPipeline
 from crawler.items import Phase1DataItem
+from scrapy.exceptions import DropItem
 
 # Setup logging
 logging.basicConfig(
@@ -164,6 +165,49 @@ class Phase1PipelineTester:
         
         return results
     
+    def test_validation_batch(self):
+        """Test that process_items_batch validates like a process_item loop"""
+        logger.info("\n=== Testing Phase 1 Enhanced Validation Batch ===")
+        
+        results = {'valid': 0, 'mismatches': []}
+        
+        # Both runs get their own items, plus ones without a municipality or any Phase 1 value
+        extra_items = [
+            {'municipality': '', 'timtaxa_livsmedel': 1200},
+            {'municipality': 'Lund', 'source_url': 'https://lund.se/taxor.html'}
+        ]
+        loop_items = self._build_items(self.test_items + extra_items)
+        batch_items = self._build_items(self.test_items + extra_items)
+        
+        loop_pipeline = Phase1EnhancedValidationPipeline()
+        loop_valid = []
+        for item in loop_items:
+            try:
+                loop_valid.append(loop_pipeline.process_item(item, self.spider))
+            except DropItem:
+                continue
+        
+        batch_pipeline = Phase1EnhancedValidationPipeline()
+        batch_valid = batch_pipeline.process_items_batch(batch_items, self.spider)
+        results['valid'] = len(batch_valid)
+        
+        # The batch shares one validation_date, so it is left out of the comparison
+        def without_date(items):
+            return [{k: v for k, v in item.items() if k != 'validation_date'} for item in items]
+        
+        if without_date(batch_valid) != without_date(loop_valid):
+            results['mismatches'].append('valid items')
+        if len({item['validation_date'] for item in batch_valid}) > 1:
+            results['mismatches'].append('validation dates')
+        if batch_pipeline.stats != loop_pipeline.stats:
+            results['mismatches'].append('statistics')
+        
+        logger.info(f"\nValidation Batch Results:")
+        logger.info(f"  Valid items: {results['valid']}")
+        logger.info(f"  Differences from process_item: {', '.join(results['mismatches']) or 'none'}")
+        
+        return results
+    
     def test_duplicate_pipeline(self):
         """Test the duplicate detection pipeline"""
         logger.info("\n=== Testing Phase 1 Duplicate Detection Pipeline ===")
@@ -214,6 +258,66 @@ class Phase1PipelineTester:
         
         return results, processed_items
     
+    def test_duplicate_batch(self):
+        """Test that process_items_batch keeps the same items as a process_item loop"""
+        logger.info("\n=== Testing Phase 1 Duplicate Detection Batch ===")
+        
+        results = {'kept': 0, 'mismatches': []}
+        
+        # Both runs get their own validated copies, plus items without a usable municipality
+        extra_items = [{'municipality': '  '}, {'municipality': None}, {'municipality': 123}]
+        loop_items = self._validated_items() + [dict(item) for item in extra_items]
+        batch_items = self._validated_items() + [dict(item) for item in extra_items]
+        
+        loop_pipeline = Phase1DuplicatesPipeline()
+        kept_by_municipality = {}
+        for item in loop_items:
+            try:
+                kept = loop_pipeline.process_item(item, self.spider)
+            except DropItem:
+                continue
+            kept_by_municipality[_normalize_municipality_name(str(kept.get('municipality') or '').strip())] = kept
+        
+        batch_pipeline = Phase1DuplicatesPipeline()
+        batch_kept = batch_pipeline.process_items_batch(batch_items, self.spider)
+        results['kept'] = len(batch_kept)
+        
+        if [dict(item) for item in batch_kept] != [dict(item) for item in kept_by_municipality.values()]:
+            results['mismatches'].append('kept items')
+        if batch_pipeline.get_duplicate_statistics() != loop_pipeline.get_duplicate_statistics():
+            results['mismatches'].append('statistics')
+        if batch_pipeline.seen_municipalities != loop_pipeline.seen_municipalities:
+            results['mismatches'].append('seen municipalities')
+        if batch_pipeline._scores != loop_pipeline._scores:
+            results['mismatches'].append('cached quality scores')
+        
+        logger.info(f"\nDuplicate Batch Results:")
+        logger.info(f"  Items kept: {results['kept']}")
+        logger.info(f"  Differences from process_item: {', '.join(results['mismatches']) or 'none'}")
+        
+        return results
+    
+    def _validated_items(self):
+        """Build fresh Phase1DataItems from the test data and return the ones that pass validation"""
+        validation_pipeline = Phase1EnhancedValidationPipeline()
+        valid_items = []
+        for item in self._build_items(self.test_items):
+            try:
+                valid_items.append(validation_pipeline.process_item(item, self.spider))
+            except DropItem:
+                continue
+        return valid_items
+    
+    def _build_items(self, test_data_list):
+        """Build fresh Phase1DataItems from test data dicts"""
+        items = []
+        for test_data in test_data_list:
+            item = Phase1DataItem()
+            for key, value in test_data.items():
+                item[key] = value
+            items.append(item)
+        return items
+    
     def test_data_pipeline(self, test_items):
         """Test the data export pipeline"""
         logger.info("\n=== Testing Phase 1 Data Pipeline ===")
@@ -333,9 +437,11 @@ class Phase1PipelineTester:
         
         # Test validation pipeline
         validation_results = self.test_validation_pipeline()
+        validation_batch_results = self.test_validation_batch()
         
         # Test duplicate detection pipeline
         duplicate_results, processed_items = self.test_duplicate_pipeline()
+        duplicate_batch_results = self.test_duplicate_batch()
         
         # Test data export pipeline
         data_results = self.test_data_pipeline(processed_items)
@@ -349,11 +455,13 @@ class Phase1PipelineTester:
         logger.info(f"  Items passed validation: {validation_results['passed']}")
         logger.info(f"  Items failed validation: {validation_results['failed']}")
         logger.info(f"  Items enhanced: {validation_results['enhanced']}")
+        logger.info(f"  Batch matches process_item: {not validation_batch_results['mismatches']}")
         
         logger.info("Duplicate Detection Pipeline:")
         logger.info(f"  Unique items processed: {duplicate_results['processed']}")
         logger.info(f"  Duplicates removed: {duplicate_results['duplicates_removed']}")
         logger.info(f"  Quality replacements: {duplicate_results['replacements']}")
+        logger.info(f"  Batch matches process_item: {not duplicate_batch_results['mismatches']}")
         
         logger.info("Data Export Pipeline:")
         logger.info(f"  Items exported: {data_results['exported']}")
@@ -367,6 +475,10 @@ class Phase1PipelineTester:
         successful_tests = (validation_results['passed'] + duplicate_results['processed'] + 
                            data_results['exported'])
         
+        if validation_batch_results['mismatches'] or duplicate_batch_results['mismatches']:
+            logger.error("❌ Batch processing differs from process_item")
+            return 1
+        
         if total_tests > 0:
             success_rate = (successful_tests / total_tests) * 100
             logger.info(f"\nOverall Pipeline Success Rate: {success_rate:.1f}%")
@@ -884,10 +884,11 @@ def start_crawler():
                     '--max-municipalities', str(max_municipalities)
                 ]
                 
-                # Start crawler process
+                # Start crawler process, with pipeline notifications enabled
                 crawler_process = subprocess.Popen(
                     cmd,
                     cwd=project_root,
+                    env={**os.environ, 'PHASE1_RT_UI': '1'},
                     stdout=subprocess.PIPE,
                     stderr=subprocess.STDOUT,
                     universal_newlines=True,